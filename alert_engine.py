@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Alert Engine - Rule-based alert evaluation on the reading write path
+"""
+
+import sqlite3
+from datetime import datetime
+
+# Alert levels, ordered by severity
+OK = 'ok'
+WARNING = 'warning'
+DANGER = 'danger'
+SEVERITY = {OK: 0, WARNING: 1, DANGER: 2}
+
+def init_alerts_schema(c):
+    """Create the alerts table and its dedup index using the given cursor."""
+    c.execute('''CREATE TABLE IF NOT EXISTS alerts
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  user_id TEXT,
+                  message TEXT,
+                  type TEXT,
+                  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                  is_read INTEGER DEFAULT 0,
+                  dedup_key TEXT)''')
+
+    # Older databases were created without the dedup key column
+    c.execute('PRAGMA table_info(alerts)')
+    if 'dedup_key' not in [row[1] for row in c.fetchall()]:
+        c.execute('ALTER TABLE alerts ADD COLUMN dedup_key TEXT')
+
+    # Repeats are suppressed here; NULL keys (legacy rows) never collide
+    c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_dedup_key ON alerts (dedup_key)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_alerts_user_timestamp ON alerts (user_id, timestamp)')
+
+class DailyCostLimitRule:
+    """Warn when the latest bill approaches or exceeds the daily cost limit."""
+    name = 'daily_cost_limit'
+
+    def __init__(self, warning_percent=90, danger_percent=100):
+        self.warning_percent = warning_percent
+        self.danger_percent = danger_percent
+
+    def evaluate(self, context):
+        """Return (level, message) for the given context."""
+        current_bill = context.get('current_bill', 0)
+        cost_limit = context.get('cost_limit', 0)
+        if not cost_limit or cost_limit <= 0:
+            return OK, None
+
+        limit_used_percent = current_bill / cost_limit * 100
+        if limit_used_percent >= self.danger_percent:
+            message = f"Alert: Daily cost limit exceeded! Current bill: ₹{current_bill:.2f}, Limit: ₹{cost_limit}"
+            return DANGER, message
+        elif limit_used_percent >= self.warning_percent:
+            remaining = cost_limit - current_bill
+            message = f"Warning: Approaching daily limit! Used: {limit_used_percent:.1f}%, Remaining: ₹{remaining:.2f}"
+            return WARNING, message
+        return OK, None
+
+    def dedup_scope(self, context):
+        """One alert per level per day and per configured limit."""
+        day = context.get('now', datetime.now()).strftime('%Y-%m-%d')
+        return f"{day}:{context.get('cost_limit', 0):g}"
+
+class AlertEngine:
+    def __init__(self, db_path='readings.db', rules=None):
+        """Initialize the alert engine with its rules."""
+        self.db_path = db_path
+        self.rules = rules if rules is not None else [DailyCostLimitRule()]
+        self._states = {}  # (user_id, rule name) -> last evaluated level
+
+    def get_state(self, user_id, rule_name):
+        """Return the last evaluated level of a rule for a user."""
+        return self._states.get((user_id, rule_name), OK)
+
+    def reset(self, user_id=None):
+        """Forget rule states, for one user or for everyone."""
+        if user_id is None:
+            self._states.clear()
+        else:
+            for key in [k for k in self._states if k[0] == user_id]:
+                del self._states[key]
+
+    def evaluate(self, user_id, context):
+        """Evaluate all rules and save an alert for each upward transition.
+
+        Returns the list of alerts that were actually inserted.
+        """
+        fired = []
+        for rule in self.rules:
+            level, message = rule.evaluate(context)
+            previous = self.get_state(user_id, rule.name)
+            self._states[(user_id, rule.name)] = level
+
+            # Only escalations fire (ok->warning, ok->danger, warning->danger);
+            # falling back to a lower level just re-arms the rule.
+            if SEVERITY[level] <= SEVERITY[previous]:
+                continue
+
+            dedup_key = f"{user_id}:{rule.name}:{level}:{rule.dedup_scope(context)}"
+            if self.save_alert(user_id, message, level, dedup_key):
+                fired.append({'rule': rule.name, 'type': level, 'message': message})
+        return fired
+
+    def save_alert(self, user_id, message, alert_type, dedup_key):
+        """Insert an alert unless one with the same dedup key already exists."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            c = conn.cursor()
+            c.execute('INSERT OR IGNORE INTO alerts (user_id, message, type, dedup_key) VALUES (?, ?, ?, ?)',
+                      (user_id, message, alert_type, dedup_key))
+            conn.commit()
+            return c.rowcount > 0
+        finally:
+            conn.close()
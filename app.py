@@ -1,24 +1,61 @@
 import sqlite3
-import cv2
 import threading
+import atexit
 import time
 import os
-import glob
-import numpy as np
-from flask import Flask, Response, render_template, jsonify, request, redirect, url_for, flash
-from datetime import datetime, timedelta
-# Removed Gemini API dependency - using Roboflow API instead
-from roboflow_integration import initialize_roboflow_detector
-from database import init_db, save_reading, get_readings, clear_all_readings
+import logging
+from flask import Flask, Blueprint, Response, render_template, jsonify, request, redirect, url_for, flash
+from datetime import datetime
+# Heavy dependencies (cv2, numpy, pandas, selenium) are imported on first use,
+# so importing this module stays cheap for workers and tests
+from database import (init_db, save_reading, get_readings, clear_all_readings, get_recent_deltas,
+                      save_runtime_state, load_runtime_state, clear_runtime_state)
+from alert_engine import AlertEngine, init_alerts_schema
+from reading_window import DuplicateWindow
+from sampling_scheduler import AdaptiveScheduler
+from reading_fusion import ReadingFusion
+from meter_inbox import MeterInbox, InboxFull
+from stream_ingest import StreamManager, parse_sources
+from frame_archive import FrameArchive
+from log_config import configure_logging
+from metrics import metrics
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this to a secure secret key
+logger = logging.getLogger(__name__)
+
+# Routes live on a blueprint; create_app() builds and configures the Flask app
+bp = Blueprint('main', __name__)
+
+DEFAULT_CONFIG = {
+    'SECRET_KEY': 'your-secret-key-here',  # Change this to a secure secret key
+    'DUPLICATE_WINDOW_SIZE': int(os.getenv('DUPLICATE_WINDOW_SIZE', '10')),
+    # Restarts keep readings and state; set to 1 to wipe readings on every start
+    'CLEAR_READINGS_ON_STARTUP': os.getenv('CLEAR_READINGS_ON_STARTUP', '0') == '1',
+    'SAMPLING_MIN_INTERVAL': float(os.getenv('SAMPLING_MIN_INTERVAL', '4.5')),
+    'SAMPLING_MAX_INTERVAL': float(os.getenv('SAMPLING_MAX_INTERVAL', '60')),
+    'SAMPLING_BACKOFF': float(os.getenv('SAMPLING_BACKOFF', '2.0')),
+    'INFERENCE_BUDGET_PER_HOUR': float(os.getenv('INFERENCE_BUDGET_PER_HOUR', '0')),  # 0 = unlimited
+    'STREAM_SOURCES': os.getenv('STREAM_SOURCES', ''),  # e.g. "default=rtsp://cam/stream,garage=0"
+    'STREAM_WORKERS': int(os.getenv('STREAM_WORKERS', '2')),
+    'STREAM_DECODE_PROCESSES': os.getenv('STREAM_DECODE_PROCESSES', '0') == '1',  # decode in child processes
+    'READING_MAX_KWH_PER_HOUR': float(os.getenv('READING_MAX_KWH_PER_HOUR', '0')),  # 0 = no rate bound
+    'READING_CONFIRMATIONS': int(os.getenv('READING_CONFIRMATIONS', '2')),
+    'INBOX_POLICY': os.getenv('INBOX_POLICY', 'latest'),  # latest, coalesce or reject
+    'INBOX_CAPACITY': int(os.getenv('INBOX_CAPACITY', '1')),
+    'DETECTION_DEADLINE': float(os.getenv('DETECTION_DEADLINE', '20')),  # seconds
+    'FRAME_ARCHIVE_DIR': os.getenv('FRAME_ARCHIVE_DIR', 'frame_archive'),  # '' disables archiving
+    'FRAME_ARCHIVE_PACK_MB': float(os.getenv('FRAME_ARCHIVE_PACK_MB', '64')),
+    'FRAME_ARCHIVE_MAX_SIDE': int(os.getenv('FRAME_ARCHIVE_MAX_SIDE', '320')),
+}
+
+# Endpoints whose responses never change and set their own caching headers
+CACHEABLE_ENDPOINTS = {'main.frame_image'}
 
 # Add cache-busting headers to prevent browser caching issues
-@app.after_request
 def after_request(response):
+    if request.endpoint in CACHEABLE_ENDPOINTS:
+        return response
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
     response.headers["Pragma"] = "no-cache"
     response.headers["Expires"] = "0"
@@ -33,27 +70,14 @@ def init_extended_db():
                   user_id TEXT,
                   daily_cost_limit REAL)''')
     
-    # Create alerts table
-    c.execute('''CREATE TABLE IF NOT EXISTS alerts
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  user_id TEXT,
-                  message TEXT,
-                  type TEXT,
-                  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                  is_read INTEGER DEFAULT 0)''')
+    # Create alerts table (with dedup index)
+    init_alerts_schema(c)
     conn.commit()
     conn.close()
 
-init_db()
-init_extended_db()
-
-# Clear all readings on startup to ensure fresh start
-clear_all_readings()
-
 # Initialize Flask-Login
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.login'
 
 # User class for Flask-Login
 class User(UserMixin):
@@ -80,8 +104,176 @@ process_started = False         # To ensure we only start once
 detection_active = False        # To track if detection is actively running
 video_current_time = 0         # Track current video time
 last_detection_time = 0        # Track last detection time
-processing_lock = False        # Lock to prevent concurrent processing
 
+# Alerts are evaluated once per new reading, not on dashboard polls
+alert_engine = AlertEngine()
+
+# Recent reading deltas per meter, so duplicate checks never hit the database
+METER_ID = "default"
+duplicate_window = DuplicateWindow(size=DEFAULT_CONFIG['DUPLICATE_WINDOW_SIZE'], tolerance=0.1)
+
+# Sampling backs off while the meter reading is stable and tightens when it changes
+sampling_scheduler = AdaptiveScheduler(min_interval=DEFAULT_CONFIG['SAMPLING_MIN_INTERVAL'])
+
+# Misreads are voted away or rejected before they reach billing, the database or alerts
+reading_fusion = ReadingFusion()
+
+# Browser-driven detections queue here per meter (built by init_app_db with its overload policy)
+detection_inbox = None
+
+# Thumbnails of the frames behind saved readings (None when FRAME_ARCHIVE_DIR is empty)
+frame_archive = None
+
+# Database setup runs once per process, no matter how many apps are created
+_db_initialized = False
+_db_init_lock = threading.Lock()
+
+def init_app_db(config):
+    """Create tables and load startup state exactly once."""
+    global _db_initialized, duplicate_window, sampling_scheduler, reading_fusion, detection_inbox, frame_archive
+    with _db_init_lock:
+        if _db_initialized:
+            return
+        init_db()
+        init_extended_db()
+        if config['CLEAR_READINGS_ON_STARTUP']:
+            clear_all_readings()
+            clear_runtime_state()
+
+        window_size = config['DUPLICATE_WINDOW_SIZE']
+        duplicate_window = DuplicateWindow(size=window_size, tolerance=0.1)
+        duplicate_window.seed(METER_ID, get_recent_deltas(window_size))
+
+        sampling_scheduler = AdaptiveScheduler(
+            min_interval=config['SAMPLING_MIN_INTERVAL'],
+            max_interval=config['SAMPLING_MAX_INTERVAL'],
+            backoff=config['SAMPLING_BACKOFF'],
+            budget_per_hour=config['INFERENCE_BUDGET_PER_HOUR']
+        )
+        reading_fusion = ReadingFusion(
+            max_rate_per_hour=config['READING_MAX_KWH_PER_HOUR'],
+            confirm=config['READING_CONFIRMATIONS']
+        )
+        detection_inbox = MeterInbox(
+            detect_and_record,
+            capacity=config['INBOX_CAPACITY'],
+            policy=config['INBOX_POLICY'],
+            deadline=config['DETECTION_DEADLINE']
+        )
+        if config['FRAME_ARCHIVE_DIR']:
+            frame_archive = FrameArchive(
+                config['FRAME_ARCHIVE_DIR'],
+                pack_max_bytes=int(config['FRAME_ARCHIVE_PACK_MB'] * 1024 * 1024),
+                max_side=config['FRAME_ARCHIVE_MAX_SIDE']
+            )
+        restore_runtime_state()
+        _db_initialized = True
+
+def persist_runtime_state():
+    """Save what a restart needs to carry on: baseline, last reading, phase and sampler state."""
+    schedule = sampling_scheduler.state(METER_ID)
+    save_runtime_state(f"meter:{METER_ID}", {
+        'initial_reading': initial_reading_value,
+        'last_reading': last_reading,
+        'last_reading_time': last_reading_time,
+        'last_bill_amount': last_bill_amount,
+        'phase': current_phase,
+        'fused_reading': reading_fusion.state(METER_ID)['value'],
+        'sampling_interval': schedule['interval'],
+        'sampled_reading': schedule['last_reading'],
+    })
+
+def restore_runtime_state():
+    """Rebuild in-memory state from the database after a restart."""
+    global initial_reading_value, last_reading, last_reading_time, last_bill_amount, current_phase, debug_info
+    state = load_runtime_state(f"meter:{METER_ID}")
+    if state is None:
+        # No saved state (first start or after a reset): fall back to the newest saved reading
+        latest = get_readings(1)
+        if latest:
+            last_reading, last_reading_time, last_bill_amount = latest[0][0], latest[0][1], latest[0][8] or 0
+        return
+
+    initial_reading_value = state.get('initial_reading')
+    last_reading = state.get('last_reading') or last_reading
+    last_reading_time = state.get('last_reading_time')
+    last_bill_amount = state.get('last_bill_amount') or 0
+    current_phase = state.get('phase') or current_phase
+    # Timestamps from the previous run mean nothing now; keep only the values
+    if state.get('fused_reading') is not None:
+        reading_fusion.restore(METER_ID, state['fused_reading'])
+    if state.get('sampling_interval') is not None:
+        sampling_scheduler.restore(METER_ID, interval=state['sampling_interval'],
+                                   last_reading=state.get('sampled_reading'))
+    if initial_reading_value is not None:
+        debug_info = f"Restored initial reading: {initial_reading_value} KWh"
+    logger.info("♻️ Restored state: initial reading %s, last reading %s", initial_reading_value, last_reading)
+
+# Server-side capture; None unless STREAM_SOURCES is configured
+stream_manager = None
+
+def start_streams(config):
+    """Start capture threads for STREAM_SOURCES exactly once."""
+    global stream_manager
+    sources = parse_sources(config['STREAM_SOURCES'])
+    if not sources:
+        return
+    with _db_init_lock:
+        if stream_manager is not None:
+            return
+        stream_manager = StreamManager(process_stream_frame, sampling_scheduler, workers=config['STREAM_WORKERS'],
+                                       processes=config['STREAM_DECODE_PROCESSES'])
+        for stream_id, source in sources.items():
+            stream_manager.add_stream(stream_id, source)
+        stream_manager.start()
+        atexit.register(stream_manager.stop)
+
+def create_app(config=None):
+    """Build the Flask app; `config` overrides DEFAULT_CONFIG."""
+    configure_logging()
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    if config:
+        app.config.update(config)
+
+    app.after_request(after_request)
+    app.teardown_appcontext(cleanup_on_shutdown)
+    login_manager.init_app(app)
+    app.register_blueprint(bp)
+
+    init_app_db(app.config)
+    start_streams(app.config)
+    return app
+
+def __getattr__(name):
+    """Build a default app on first access to `app.app` (e.g. `gunicorn app:app`)."""
+    global app
+    if name == 'app':
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_cost_limit(user_id):
+    """Return the daily cost limit for a user (0 if none is set)."""
+    conn = sqlite3.connect('readings.db')
+    c = conn.cursor()
+    c.execute('SELECT daily_cost_limit FROM user_settings WHERE user_id = ?', (user_id,))
+    result = c.fetchone()
+    conn.close()
+    return float(result[0]) if result else 0
+
+def evaluate_alerts(user_id, current_bill):
+    """Run the alert rules against the latest bill amount."""
+    try:
+        alert_engine.evaluate(user_id, {
+            'current_bill': current_bill,
+            'cost_limit': get_cost_limit(user_id),
+            'now': datetime.now()
+        })
+    except Exception as e:
+        logger.error("Error evaluating alerts: %s", e)
+
+@metrics.timed('kseb_bill')
 def get_bill_from_site(consumption, phase):
     """
     Use Selenium (like bill calc.py) to get the bill amount 
@@ -124,12 +316,13 @@ def get_bill_from_site(consumption, phase):
         time.sleep(2)
         return amount
     except Exception as e:
-        print("Error in get_bill_from_site:", e)
+        metrics.record_error('kseb_bill')
+        logger.error("Error in get_bill_from_site: %s", e)
         return None
     finally:
         driver.quit()
 
-@app.route('/get_status')
+@bp.route('/get_status')
 def get_status():
     """Return status for Roboflow video processing."""
     global process_started, debug_info
@@ -149,13 +342,13 @@ def get_status():
             'status': 'Roboflow Detection Stopped'
         })
 
-@app.route('/start_process', methods=['POST'])
+@bp.route('/start_process', methods=['POST'])
 def start_process():
     """Start Roboflow video processing for meter reading detection."""
-    global process_started, debug_info, initial_reading_value, detection_active
+    global process_started, debug_info, detection_active
     if not process_started:
-        # Reset initial reading when starting afresh
-        initial_reading_value = None
+        # Baseline, fused reading and sampling state survive stop/start and restarts;
+        # /clear_all starts afresh, and a video that jumps back resets the filters itself
         process_started = True
         detection_active = True
         debug_info = "Roboflow detection started - ready to detect meter readings"
@@ -163,7 +356,7 @@ def start_process():
     else:
         return "Process already running", 200
 
-@app.route('/stop_process', methods=['POST'])
+@bp.route('/stop_process', methods=['POST'])
 def stop_process():
     """Stop Roboflow video processing."""
     global process_started, debug_info, detection_active
@@ -172,7 +365,7 @@ def stop_process():
     debug_info = "Roboflow detection stopped"
     return "Process stopped", 200
 
-@app.route('/get_reading')
+@bp.route('/get_reading')
 def get_reading():
     """Return current reading, bill amount and debug info."""
     return jsonify({
@@ -183,7 +376,7 @@ def get_reading():
         'initial_reading': initial_reading_value
     })
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Handle login with hardcoded credentials"""
     if request.method == 'POST':
@@ -193,26 +386,26 @@ def login():
         if email == VALID_EMAIL and password == VALID_PASSWORD:
             user = User(email)
             login_user(user)
-            return redirect(url_for('camera'))
+            return redirect(url_for('main.camera'))
         else:
             flash('Invalid email or password')
     
     return render_template('Login.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('Logged out successfully')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
-@app.route('/')
+@bp.route('/')
 def index():
     """Always redirect to login page first"""
     # Force redirect to login page
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
-@app.route('/camera')
+@bp.route('/camera')
 @login_required
 def camera():
     """Render camera feed page (requires authentication)"""
@@ -221,25 +414,25 @@ def camera():
                          last_reading_time=last_reading_time,
                          debug_info=debug_info)
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     """Render main dashboard page"""
     return render_template('dashboard.html')
 
-@app.route('/profile')
+@bp.route('/profile')
 @login_required
 def profile():
     """Render main dashboard page"""
     return render_template('profile.html')
 
-@app.route('/alerts')
+@bp.route('/alerts')
 @login_required
 def alerts():
     """Render main dashboard page"""
     return render_template('alerts.html')
 
-@app.route('/get_readings')
+@bp.route('/get_readings')
 def get_readings_route():
     """Get all readings from the database"""
     readings = get_readings()
@@ -255,7 +448,7 @@ def get_readings_route():
         'total_amount': r[8]
     } for r in readings])
 
-@app.route('/clear_readings', methods=['POST'])
+@bp.route('/clear_readings', methods=['POST'])
 def clear_readings():
     """Clear all readings from the database but keep the cost limit."""
     global initial_reading_value, last_reading, last_reading_time, last_bill_amount, debug_info
@@ -266,6 +459,7 @@ def clear_readings():
         c.execute('DELETE FROM readings')
         conn.commit()
         conn.close()
+        clear_runtime_state()
 
         # Reset global variables
         initial_reading_value = None
@@ -273,28 +467,32 @@ def clear_readings():
         last_reading_time = None
         last_bill_amount = 0
         debug_info = "All readings cleared"
+        alert_engine.reset()
+        duplicate_window.clear()
+        reading_fusion.reset(METER_ID)
 
         return jsonify({
             "success": True,
             "message": "All readings cleared successfully"
         })
     except Exception as e:
-        print(f"Error clearing readings: {e}")
+        logger.error("Error clearing readings: %s", e)
         return jsonify({
             "success": False,
             "message": f"Failed to clear readings: {str(e)}"
         })
 
-@app.route('/update_phase', methods=['POST'])
+@bp.route('/update_phase', methods=['POST'])
 def update_phase():
     """Update meter phase based on user selection from the webpage."""
     global current_phase
     data = request.get_json()
     phase = data.get('phase', 'single')
     current_phase = phase  # "single" or "three"
+    persist_runtime_state()
     return "Phase updated", 200
 
-@app.route('/update_video_time', methods=['POST'])
+@bp.route('/update_video_time', methods=['POST'])
 def update_video_time():
     """Update current video time for continuous detection."""
     global video_current_time, last_detection_time, detection_active
@@ -306,54 +504,129 @@ def update_video_time():
     video_time = data.get('video_time', 0)
     video_current_time = video_time
     
-    # Check if we should detect (every 5 seconds)
-    if video_time > last_detection_time + 4.5:
+    # Detect when the meter's adaptive interval has elapsed and the inference budget allows it
+    if sampling_scheduler.should_sample(METER_ID, video_time):
         last_detection_time = video_time
         # Trigger detection
         try:
             result = process_meter_reading_internal(video_time)
             return jsonify(result)
+        except InboxFull as e:
+            return busy_response(e)
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)})
     
     return jsonify({'success': True, 'message': 'Video time updated'})
 
+def busy_response(error):
+    """429 for a meter whose detection inbox is full."""
+    response = jsonify({'success': False, 'message': 'Detection busy - retry later', 'skip_toast': True})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 def process_meter_reading_internal(video_time):
-    """Internal function to process meter reading at specific video time."""
-    global last_reading, last_reading_time, debug_info, initial_reading_value, current_phase, last_bill_amount, processing_lock
-    
-    # Prevent concurrent processing
-    if processing_lock:
-        print(f"PROCESSING LOCKED: Another process is already running, skipping video time {video_time}")
-        return {'success': True, 'message': 'Processing locked - skipping', 'reading': None, 'skip_toast': True}
-    
-    processing_lock = True
-    print(f"PROCESSING LOCK ACQUIRED: Starting processing for video time {video_time}")
+    """Queue a detection at `video_time` for the dashboard meter and wait for its outcome.
+
+    Raises InboxFull when the inbox policy is 'reject' and the meter is busy.
+    """
+    ticket = detection_inbox.submit(METER_ID, video_time)
+    if not ticket.wait(max(0.0, ticket.deadline - time.monotonic())):
+        # Still running; its result will be discarded at the deadline check
+        return {'success': True, 'message': 'Detection past its deadline - skipping', 'reading': None, 'skip_toast': True}
+    if ticket.status == 'done':
+        return ticket.result
+    if ticket.status == 'error':
+        return {'success': False, 'message': ticket.result}
+    logger.debug("Detection at video time %s was %s", video_time, ticket.status)
+    return {'success': True, 'message': f'Detection {ticket.status} - skipping', 'reading': None, 'skip_toast': True}
+
+@metrics.timed('process_meter_reading')
+def detect_and_record(video_time, deadline):
+    """Inbox handler: detect at `video_time`, then record unless the deadline has passed."""
+    # Initialize Roboflow detector
+    from roboflow_integration import initialize_roboflow_detector
+    detector = initialize_roboflow_detector()
     
+    # Process video frame using Roboflow API with faster processing
+    result = detector.process_video_frame('static/sample.mp4', video_time, confidence=0.05)
+    if time.monotonic() > deadline:
+        # Nobody is waiting for this any more, and billing on it would be stale
+        metrics.inc('inbox_dropped', meter=METER_ID, reason='late_result')
+        return {'success': True, 'message': 'Result discarded after deadline', 'reading': None, 'skip_toast': True}
+    frame = None
+    if frame_archive is not None and result['success']:
+        try:
+            # Served from the decoder's frame cache, not decoded again
+            frame = detector.extract_frame_from_video('static/sample.mp4', video_time)
+        except ValueError:
+            pass
+    return record_detection(METER_ID, result, video_time, frame)
+
+def process_stream_frame(meter_id, timestamp, frame):
+    """Detection worker for server-side streams (see stream_ingest.StreamManager)."""
+    from roboflow_integration import initialize_roboflow_detector
+    detector = initialize_roboflow_detector()
+    result = detector.process_frame(meter_id, frame, timestamp, confidence=0.05)
+    return record_detection(meter_id, result, timestamp, frame)
+
+# Browser-driven and stream detections can finish at the same time
+_record_lock = threading.Lock()
+
+def archive_frame(frame, roi):
+    """Archive the frame behind a saved reading; returns its id, or None."""
+    if frame_archive is None or frame is None:
+        return None
     try:
-        print(f"Processing meter reading at video time: {video_time}")
-        
-        # Initialize Roboflow detector
-        detector = initialize_roboflow_detector()
-        
-        # Process video frame using Roboflow API with faster processing
-        result = detector.process_video_frame('static/sample.mp4', video_time, confidence=0.05)
-        
-        if not result['success']:
+        with metrics.timer('frame_archive'):
+            return frame_archive.put(frame, roi)
+    except Exception as e:
+        logger.error("❌ Could not archive frame: %s", e)
+        return None
+
+def record_detection(meter_id, result, video_time, frame=None):
+    """Turn a detector result into a saved reading, bill and alert evaluation.
+
+    `frame` is the image the detection ran on; it is archived with saved readings.
+    """
+    global last_reading, last_reading_time, debug_info, initial_reading_value, current_phase, last_bill_amount
+    
+    if not result['success']:
+        sampling_scheduler.record_failure(meter_id, video_time)
+        if meter_id == METER_ID:
             debug_info = f"Roboflow detection failed at {video_time:.1f}s: {result.get('error', 'Unknown error')}"
-            return {'success': False, 'message': result.get('error', 'Detection failed')}
-        
-        # Extract reading from Roboflow result
-        reading_value = result['reading']
-        current_units = float(reading_value)
-        
-        print(f"Roboflow detected meter reading: {current_units} at video time: {video_time}")
+        return {'success': False, 'message': result.get('error', 'Detection failed')}
+    
+    # Extract reading from Roboflow result
+    reading_value = result['reading']
+    digits = result.get('digits') or [(d, result.get('avg_confidence', 1.0)) for d in reading_value]
+    
+    # Vote digits over recent frames; drop readings that go backwards or rise implausibly fast
+    current_units, status = reading_fusion.update(meter_id, digits, video_time)
+    rejected = status.startswith('rejected')
+    # The scheduler sees the raw reading so a change (or a rejection) tightens sampling
+    sampling_scheduler.record(meter_id, video_time, float(reading_value),
+                              0.0 if rejected else result.get('avg_confidence'))
+    if rejected:
+        metrics.inc('readings_rejected', meter=meter_id, reason=status)
+        logger.info("Rejected reading %s for meter %s (%s)", reading_value, meter_id, status, extra={'sample': True})
+        return {'success': True, 'message': 'Implausible reading rejected', 'reading': current_units, 'skip_toast': True}
+    
+    if meter_id != METER_ID:
+        # Billing, history and alerts cover the dashboard meter; other streams are monitored only
+        metrics.set_gauge('meter_reading_kwh', current_units, meter=meter_id)
+        logger.info("Meter %s reads %s KWh at %.1fs", meter_id, current_units, video_time, extra={'sample': True})
+        return {'success': True, 'message': 'Reading recorded', 'reading': current_units}
+    
+    with _record_lock:
+        logger.debug("Roboflow detected meter reading %s at video time %s", current_units, video_time, extra={'sample': True})
         
         # Set initial reading if this is the first valid reading
         if initial_reading_value is None:
             initial_reading_value = current_units
             debug_info = f"Initial reading set: {initial_reading_value} KWh"
-            print(f"INITIAL READING SET: {initial_reading_value} KWh - No calculation needed")
+            logger.info("Initial reading set: %s KWh", initial_reading_value)
+            persist_runtime_state()
             return {'success': True, 'message': 'Initial reading set', 'reading': current_units}
         
         # Calculate difference from initial reading
@@ -362,40 +635,18 @@ def process_meter_reading_internal(video_time):
         # Skip if difference is 0 or negative (should not happen after initial reading is set)
         if difference_units <= 0:
             debug_info = f"Initial reading: {initial_reading_value} KWh | Current reading: {current_units} KWh"
-            print(f"SKIPPING SAME READING: Current reading same as initial reading")
+            logger.debug("Skipping reading equal to the initial reading", extra={'sample': True})
             return {'success': True, 'message': 'Same reading as initial - skipping', 'reading': current_units, 'skip_toast': True}
         
-        # Check if this is a duplicate reading by checking database
-        conn = sqlite3.connect('readings.db')
-        c = conn.cursor()
-        c.execute('SELECT reading FROM readings ORDER BY timestamp DESC LIMIT 10')
-        recent_readings = c.fetchall()
-        conn.close()
-        
-        print(f"Checking for duplicates. Current difference: {difference_units:.1f} KWh")
-        print(f"Recent readings from DB: {[r[0] for r in recent_readings]}")
-        
         # Check if this difference already exists in recent readings
-        is_duplicate = False
-        for (reading_str,) in recent_readings:
-            try:
-                existing_diff = float(reading_str.replace(' KWh (Δ)', ''))
-                print(f"Comparing {difference_units:.1f} with existing {existing_diff:.1f}")
-                if abs(difference_units - existing_diff) < 0.1:
-                    is_duplicate = True
-                    print(f"DUPLICATE DETECTED: {difference_units:.1f} KWh matches existing {existing_diff:.1f} KWh")
-                    break
-            except ValueError:
-                continue
-        
-        if is_duplicate:
+        if duplicate_window.is_duplicate(METER_ID, difference_units):
             debug_info = f"Current: {current_units} KWh | Initial: {initial_reading_value} KWh | Difference: {difference_units:.1f} KWh | Duplicate reading; skipping"
-            print(f"SKIPPING DUPLICATE: {debug_info}")
+            logger.debug("Skipping duplicate: %s", debug_info)
             return {'success': True, 'message': 'Duplicate reading skipped', 'reading': current_units}
         
         new_reading = f"{difference_units:.0f} KWh (Δ)"
         
-        print(f"NEW READING DETECTED: {new_reading} - Saving to database")
+        logger.info("New reading detected: %s", new_reading)
         
         # Calculate bill amount using Selenium
         phase_num = 1 if current_phase == "single" else 3
@@ -405,7 +656,7 @@ def process_meter_reading_internal(video_time):
             bill_amount = 0
         
         last_bill_amount = round(bill_amount, 2)
-        print(f"Bill amount: Rs.{last_bill_amount}")
+        logger.debug("Bill amount: Rs.%s", last_bill_amount)
         
         # Update global variables
         last_reading = new_reading
@@ -422,11 +673,17 @@ def process_meter_reading_internal(video_time):
             'subsidy': 0
         }
         
-        # Use a descriptive image path for Roboflow detection
-        image_path = f"roboflow_frame_{video_time:.1f}s.jpg"
+        # Point at the archived thumbnail, or use a descriptive name when there is none
+        frame_id = archive_frame(frame, result.get('roi'))
+        image_path = f"/frame/{frame_id}" if frame_id else f"roboflow_frame_{video_time:.1f}s.jpg"
         save_reading(last_reading, image_path, bill_details)
+        duplicate_window.add(METER_ID, float(f"{difference_units:.0f}"))
+        persist_runtime_state()
         
-        print(f"SUCCESSFULLY SAVED TO DATABASE: {last_reading} at {last_reading_time}")
+        logger.info("Saved reading %s at %s", last_reading, last_reading_time)
+        
+        # Use admin as the user_id since we're using hardcoded login
+        evaluate_alerts("admin", last_bill_amount)
         
         return {
             'success': True, 
@@ -435,13 +692,29 @@ def process_meter_reading_internal(video_time):
             'difference': difference_units,
             'bill_amount': last_bill_amount
         }
-        
-    finally:
-        # Always release the lock
-        processing_lock = False
-        print(f"PROCESSING LOCK RELEASED: Finished processing for video time {video_time}")
 
-@app.route('/process_meter_reading', methods=['POST'])
+@bp.route('/frame/<frame_id>')
+def frame_image(frame_id):
+    """Archived thumbnail of a detection frame; ids are content hashes, so it can be cached forever."""
+    data = frame_archive.get(frame_id) if frame_archive is not None else None
+    if data is None:
+        return jsonify({'error': 'Frame not found'}), 404
+    response = Response(data, mimetype='image/jpeg')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.set_etag(frame_id)
+    return response.make_conditional(request)
+
+@bp.route('/streams')
+def streams_status():
+    """Connection state and frame counts for server-side streams."""
+    return jsonify(stream_manager.status() if stream_manager else {})
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    """Expose stage latencies, in-flight gauges and error counters for Prometheus."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/process_meter_reading', methods=['POST'])
 def process_meter_reading():
     """Process meter reading from video frame detection using Roboflow API."""
     try:
@@ -454,11 +727,13 @@ def process_meter_reading():
         result = process_meter_reading_internal(video_time)
         return jsonify(result)
         
+    except InboxFull as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"Error processing meter reading: {e}")
+        logger.exception("Error processing meter reading: %s", e)
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/set_cost_limit', methods=['POST'])
+@bp.route('/set_cost_limit', methods=['POST'])
 @login_required
 def set_cost_limit():
     """Set daily cost limit for the user"""
@@ -507,6 +782,10 @@ def set_cost_limit():
             raise e
         finally:
             conn.close()
+        
+        # Re-check the latest bill against the new limit
+        if last_bill_amount:
+            evaluate_alerts(user_id, last_bill_amount)
             
         return jsonify({
             "success": True,
@@ -519,13 +798,13 @@ def set_cost_limit():
             "message": "Invalid cost limit value"
         })
     except Exception as e:
-        print(f"Error setting cost limit: {str(e)}")
+        logger.error("Error setting cost limit: %s", e)
         return jsonify({
             "success": False,
             "message": f"Error setting cost limit: {str(e)}"
         })
 
-@app.route('/clear_cost_limit', methods=['POST'])
+@bp.route('/clear_cost_limit', methods=['POST'])
 @login_required
 def clear_cost_limit():
     """Clear only the cost limit setting"""
@@ -539,6 +818,7 @@ def clear_cost_limit():
         c.execute('DELETE FROM user_settings WHERE user_id = ?', (user_id,))
         conn.commit()
         conn.close()
+        alert_engine.reset(user_id)
         
         return jsonify({
             "success": True,
@@ -550,11 +830,11 @@ def clear_cost_limit():
             "message": f"Error clearing cost limit: {str(e)}"
         })
 
-@app.route('/clear_all', methods=['POST'])
+@bp.route('/clear_all', methods=['POST'])
 @login_required
 def clear_all():
     """Clear all readings only (preserve user settings like daily limit)"""
-    global initial_reading_value, last_reading, last_reading_time, last_bill_amount, debug_info, detection_active, video_current_time, last_detection_time, processing_lock
+    global initial_reading_value, last_reading, last_reading_time, last_bill_amount, debug_info, detection_active, video_current_time, last_detection_time
     try:
         conn = sqlite3.connect('readings.db')
         c = conn.cursor()
@@ -562,6 +842,7 @@ def clear_all():
         c.execute('DELETE FROM readings')
         conn.commit()
         conn.close()
+        clear_runtime_state()
         
         # Reset ALL global variables for fresh start
         initial_reading_value = None
@@ -572,9 +853,12 @@ def clear_all():
         detection_active = False
         video_current_time = 0
         last_detection_time = 0
-        processing_lock = False
+        alert_engine.reset()
+        duplicate_window.clear()
+        sampling_scheduler.reset()
+        reading_fusion.reset()
         
-        print("CLEAR ALL: All global variables reset for fresh start")
+        logger.info("Clear all: global state reset for fresh start")
         
         return jsonify({
             "success": True,
@@ -586,7 +870,7 @@ def clear_all():
             "message": f"Error clearing data: {str(e)}"
         })
 
-@app.route('/get_dashboard_data')
+@bp.route('/get_dashboard_data')
 @login_required
 def get_dashboard_data():
     """Get all dashboard data including current reading, average, and limits"""
@@ -598,14 +882,7 @@ def get_dashboard_data():
         user_id = "admin"
         
         # Get user's cost limit first
-        conn = sqlite3.connect('readings.db')
-        c = conn.cursor()
-        c.execute('SELECT daily_cost_limit FROM user_settings WHERE user_id = ?', (user_id,))
-        result = c.fetchone()
-        cost_limit = float(result[0]) if result else 0
-        conn.close()
-        
-        print(f"Retrieved cost limit: {cost_limit}")  # Debug print
+        cost_limit = get_cost_limit(user_id)
         
         if readings:
             # Get the latest reading for current consumption
@@ -613,7 +890,8 @@ def get_dashboard_data():
             # Extract numeric value from reading (remove 'KWh' and '(Δ)')
             reading_value = latest_reading[0].split()[0]
             current_reading = latest_reading[0]  # Use the full reading text
-            current_bill = float(latest_reading[8])  # Total amount from the last reading
+            # Total amount from the newest reading that has a bill
+            current_bill = next((float(r[8]) for r in readings if r[8] is not None), 0.0)
             
             # Calculate average daily usage from all readings
             total_units = sum(float(r[0].split()[0]) for r in readings if r[0].split()[0].replace('.','').isdigit())
@@ -644,7 +922,7 @@ def get_dashboard_data():
                     peak_hours_counts[slot] += 1
                     
                 except (ValueError, IndexError) as e:
-                    print(f"Error processing reading: {e}")
+                    logger.debug("Error processing reading: %s", e)
                     continue
             
             # Calculate averages for peak hours
@@ -666,10 +944,6 @@ def get_dashboard_data():
         limit_used_percent = (current_bill / cost_limit * 100) if cost_limit > 0 else 0
         limit_remaining_percent = max(0, 100 - limit_used_percent)
 
-        # Generate alerts based on latest bill amount
-        if cost_limit > 0 and readings:
-            save_limit_alert(user_id, current_bill, cost_limit, limit_used_percent)
-
         response_data = {
             "current_reading": current_reading,
             "average_daily": f"{avg_daily:.1f}",
@@ -682,46 +956,22 @@ def get_dashboard_data():
             "consumption_labels": consumption_labels,
             "peak_hours_data": peak_hours_data
         }
-        print(f"Sending dashboard data: {response_data}")  # Debug print
         return jsonify(response_data)
         
     except Exception as e:
-        print(f"Error in get_dashboard_data: {str(e)}")
+        logger.exception("Error in get_dashboard_data: %s", e)
         return jsonify({"error": str(e)})
 
 def cleanup():
-    """Clean up resources and logout users"""
+    """Clean up resources; readings, saved state and cost limits are kept for the next start."""
     global process_started
     process_started = False
     try:
         pass  # No camera to release in video mode
     except Exception as e:
-        print("Error in cleanup:", e)
-    
-    # Clear user sessions only (not readings)
-    try:
-        conn = sqlite3.connect('readings.db')
-        c = conn.cursor()
-        c.execute('DELETE FROM user_settings')  # Clear user settings
-        conn.commit()
-        conn.close()
-        print("🧹 User sessions cleared")
-    except Exception as e:
-        print("Error clearing user sessions:", e)
+        logger.error("Error in cleanup: %s", e)
 
-def save_alert(user_id, message, alert_type):
-    """Save an alert to the database"""
-    try:
-        conn = sqlite3.connect('readings.db')
-        c = conn.cursor()
-        c.execute('INSERT INTO alerts (user_id, message, type) VALUES (?, ?, ?)',
-                 (user_id, message, alert_type))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Error saving alert: {e}")
-
-@app.route('/get_alerts')
+@bp.route('/get_alerts')
 @login_required
 def get_alerts():
     """Get all alerts for the current user"""
@@ -743,7 +993,7 @@ def get_alerts():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/mark_alert_read/<int:alert_id>', methods=['POST'])
+@bp.route('/mark_alert_read/<int:alert_id>', methods=['POST'])
 @login_required
 def mark_alert_read(alert_id):
     """Mark an alert as read"""
@@ -758,7 +1008,7 @@ def mark_alert_read(alert_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/clear_alerts', methods=['POST'])
+@bp.route('/clear_alerts', methods=['POST'])
 @login_required
 def clear_alerts():
     """Clear all alerts for the current user"""
@@ -772,37 +1022,37 @@ def clear_alerts():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Modify the updateDashboard function to save alerts
-def save_limit_alert(user_id, current_bill, cost_limit, limit_used_percent):
-    if limit_used_percent >= 100:
-        message = f"Alert: Daily cost limit exceeded! Current bill: ₹{current_bill:.2f}, Limit: ₹{cost_limit}"
-        save_alert(user_id, message, "danger")
-    elif limit_used_percent >= 90:
-        remaining = cost_limit - current_bill
-        message = f"Warning: Approaching daily limit! Used: {limit_used_percent:.1f}%, Remaining: ₹{remaining:.2f}"
-        save_alert(user_id, message, "warning")
-
-@app.teardown_appcontext
 def cleanup_on_shutdown(error):
     """Called when the application context is torn down."""
     if error:
-        print(f"Error during cleanup: {error}")
+        logger.error("Error during cleanup: %s", error)
     # Only cleanup process state, not readings
     global process_started
     process_started = False
 
+def reset_all_data():
+    """Admin reset: delete readings, saved runtime state and user settings (cost limits)."""
+    init_db()
+    init_extended_db()
+    clear_all_readings()
+    clear_runtime_state()
+    conn = sqlite3.connect('readings.db')
+    c = conn.cursor()
+    c.execute('DELETE FROM user_settings')
+    conn.commit()
+    conn.close()
+    logger.info("🧹 Readings, runtime state and user settings cleared")
+
 if __name__ == '__main__':
-    # Clear all user sessions on startup to force login
-    print("🧹 Clearing all user sessions on startup...")
-    try:
-        conn = sqlite3.connect('readings.db')
-        c = conn.cursor()
-        c.execute('DELETE FROM user_settings')  # Clear user settings
-        conn.commit()
-        conn.close()
-        print("✅ All user sessions cleared - users will need to login")
-    except Exception as e:
-        print(f"Error clearing sessions: {e}")
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the meter reading web app")
+    parser.add_argument("--reset", action="store_true",
+                        help="Delete readings, saved state and cost limits before starting")
+    args = parser.parse_args()
+    if args.reset:
+        configure_logging()
+        reset_all_data()
+    app = create_app()
     
     # Force clear Flask session data
     import shutil
@@ -813,18 +1063,18 @@ if __name__ == '__main__':
         for file in os.listdir(session_dir):
             if file.startswith('flask_session_'):
                 os.remove(os.path.join(session_dir, file))
-        print("✅ Flask session files cleared")
+        logger.info("✅ Flask session files cleared")
     except Exception as e:
-        print(f"Error clearing Flask sessions: {e}")
+        logger.error("Error clearing Flask sessions: %s", e)
     
     os.makedirs('input', exist_ok=True)
     try:
         app.run(host='0.0.0.0', port=5000, debug=False)
     except KeyboardInterrupt:
-        print("KeyboardInterrupt received.")
+        logger.info("KeyboardInterrupt received.")
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
     finally:
-        print("Cleaning up and logging out all users...")
+        logger.info("Cleaning up and logging out all users...")
         cleanup()
-        print("Cleanup complete. All users logged out.")
+        logger.info("Cleanup complete. All users logged out.")
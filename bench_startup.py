@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Measure import, app creation and first-request latency
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Runs in a fresh interpreter so module caches never skew the numbers
+PROBE = r'''
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+flask_app = app_module.create_app({'TESTING': True})
+t2 = time.perf_counter()
+client = flask_app.test_client()
+client.get('/login')
+t3 = time.perf_counter()
+client.get('/get_reading')
+t4 = time.perf_counter()
+heavy = [m for m in ('cv2', 'numpy', 'pandas', 'selenium') if m in sys.modules]
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'create_app_ms': (t2 - t1) * 1000,
+    'first_request_ms': (t3 - t2) * 1000,
+    'second_request_ms': (t4 - t3) * 1000,
+    'heavy_modules_loaded': heavy,
+}))
+'''
+
+def run_probe(repo_dir):
+    """Run one cold-start measurement in a scratch directory."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE, repo_dir],
+            cwd=work_dir, stderr=subprocess.DEVNULL, text=True
+        )
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to measure")
+    args = parser.parse_args()
+
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    results = [run_probe(repo_dir) for _ in range(args.runs)]
+
+    print(f"🚀 Startup benchmark ({args.runs} cold starts)")
+    for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'second_request_ms'):
+        values = sorted(r[key] for r in results)
+        median = values[len(values) // 2]
+        print(f"   {key:<18} median {median:8.1f} ms   min {values[0]:8.1f} ms   max {values[-1]:8.1f} ms")
+    print(f"   Heavy modules loaded at startup: {results[-1]['heavy_modules_loaded'] or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import json
 import sqlite3
+import logging
 from datetime import datetime
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 def init_db():
     """Initialize the database and create tables if they don't exist."""
@@ -22,9 +27,19 @@ def init_db():
         )
     ''')
     
+    # Runtime state (baseline reading, phase, sampler state) kept across restarts
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS runtime_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
     conn.commit()
     conn.close()
 
+@metrics.timed('db_save_reading')
 def save_reading(reading, image_path=None, bill_details=None):
     """Save a new reading to the database."""
     conn = sqlite3.connect('readings.db')
@@ -49,6 +64,7 @@ def save_reading(reading, image_path=None, bill_details=None):
     conn.commit()
     conn.close()
 
+@metrics.timed('db_clear_readings')
 def clear_all_readings():
     """Clear all readings from the database."""
     conn = sqlite3.connect('readings.db')
@@ -58,8 +74,36 @@ def clear_all_readings():
     conn.commit()
     conn.close()
     
-    print("✅ All meter readings cleared from database")
+    logger.info("✅ All meter readings cleared from database")
+
+@metrics.timed('db_save_state')
+def save_runtime_state(key, state):
+    """Store a JSON-serialisable dict under `key`, replacing any previous value."""
+    conn = sqlite3.connect('readings.db')
+    c = conn.cursor()
+    c.execute('INSERT OR REPLACE INTO runtime_state (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)',
+              (key, json.dumps(state)))
+    conn.commit()
+    conn.close()
 
+def load_runtime_state(key):
+    """Return the dict saved under `key`, or None."""
+    conn = sqlite3.connect('readings.db')
+    c = conn.cursor()
+    c.execute('SELECT value FROM runtime_state WHERE key = ?', (key,))
+    row = c.fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+def clear_runtime_state():
+    """Forget all saved runtime state."""
+    conn = sqlite3.connect('readings.db')
+    c = conn.cursor()
+    c.execute('DELETE FROM runtime_state')
+    conn.commit()
+    conn.close()
+
+@metrics.timed('db_get_readings')
 def get_readings(limit=50):
     """Get the most recent readings from the database."""
     conn = sqlite3.connect('readings.db')
@@ -78,3 +122,14 @@ def get_readings(limit=50):
     conn.close()
     
     return readings
+
+def get_recent_deltas(limit=10):
+    """Get the numeric deltas of the most recent readings, oldest first."""
+    deltas = []
+    for row in get_readings(limit):
+        try:
+            deltas.append(float(row[0].replace(' KWh (Δ)', '')))
+        except ValueError:
+            continue
+    deltas.reverse()
+    return deltas
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Detector Backends - Pluggable digit detectors returning Roboflow-style predictions
+"""
+
+import io
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+from frame_encoding import JpegEncoder, encode_image
+from inference_cache import get_default_cache
+from inference_client import InferenceClient, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+def group_digits_to_reading(detections):
+    """Group detected digits into a single meter reading."""
+    if not detections or 'predictions' not in detections:
+        return None
+        
+    # Sort detections by x-coordinate (left to right)
+    sorted_detections = sorted(detections['predictions'], key=lambda x: x['x'])
+    
+    # Extract digits
+    digits = []
+    for det in sorted_detections:
+        if det['class'] not in ['.', '-']:
+            digits.append(det['class'])
+    
+    if not digits:
+        return None
+        
+    # Join digits into reading
+    reading = ''.join(digits)
+    
+    # For 4-digit readings
+    if len(reading) < 4:
+        reading = reading.zfill(4)
+    elif len(reading) > 4:
+        reading = reading[:4]
+        
+    return reading
+
+def digit_confidences(detections):
+    """Return [(digit, confidence)] left to right, without padding or truncation."""
+    ordered = sorted(detections['predictions'], key=lambda x: x['x'])
+    return [(det['class'], det['confidence']) for det in ordered if det['class'] not in ['.', '-']]
+
+class DetectorBackend:
+    """Interface: detect(image, confidence) -> {'predictions': [...]} or None.
+
+    Each prediction has 'class', 'x', 'y', 'width', 'height' (box centre and
+    size in image pixels) and 'confidence', like the hosted Roboflow API.
+
+    Subclasses implement infer(payload, confidence) and, when the service
+    wants bytes, encode(image). The base class adds the per-backend
+    'detect_<name>' timer and the shared result cache on top.
+    """
+    name = 'base'
+    cache = None           # InferenceCache for results keyed by encoded payload
+    max_concurrency = 1    # Requests detect_many() keeps in flight
+
+    @property
+    def model_id(self):
+        return self.name
+
+    def encode(self, image):
+        """Turn an image path or ndarray frame into what infer() takes."""
+        return image
+
+    def infer(self, payload, confidence=0.1):
+        raise NotImplementedError
+
+    def detect_encoded(self, payload, confidence=0.1):
+        """Detect on an already encoded payload, using the cache when there is one."""
+        with metrics.timer(f'detect_{self.name}'):
+            key = None
+            if self.cache is not None:
+                key = self.cache.make_key(payload, self.model_id, confidence, 0.5)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    metrics.inc('inference_cache_hits')
+                    return cached
+                metrics.inc('inference_cache_misses')
+            result = self.infer(payload, confidence)
+            if key is not None and result is not None:
+                self.cache.put(key, result)
+            return result
+
+    def detect(self, image, confidence=0.1):
+        return self.detect_encoded(self.encode(image), confidence)
+
+    def detect_many(self, images, confidence=0.1):
+        """Detect several images, keeping up to max_concurrency requests in flight.
+
+        Results come back in input order.
+        """
+        images = list(images)
+        if self.max_concurrency <= 1 or len(images) <= 1:
+            return [self.detect(image, confidence) for image in images]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(images))) as executor:
+            return list(executor.map(lambda image: self.detect(image, confidence), images))
+
+class RoboflowBackend(DetectorBackend):
+    name = 'roboflow'
+    max_concurrency = 4
+
+    def __init__(self, base_url, api_key, jpeg_quality=95, client=None, cache=None, model_id=None):
+        """Hosted Roboflow model behind the pooled inference client.
+
+        With a `cache` (InferenceCache), identical uploads for the same model
+        and parameters are answered from disk.
+        """
+        self.jpeg_encoder = JpegEncoder(quality=jpeg_quality)
+        self.client = client or InferenceClient(base_url, api_key)
+        self.cache = cache
+        self._model_id = model_id or base_url
+
+    @property
+    def model_id(self):
+        return self._model_id
+
+    def encode(self, image):
+        # Encode image in memory
+        with metrics.timer('jpeg_encode'):
+            return encode_image(image, self.jpeg_encoder)
+
+    def infer(self, payload, confidence=0.1):
+        try:
+            metrics.inc('upload_bytes', len(payload))
+            # Make request (pooled session, timeouts, retries, circuit breaker)
+            with metrics.timer('roboflow_request'):
+                return self.client.infer(payload, confidence, overlap=0.5)
+
+        except CircuitOpenError as e:
+            metrics.inc('inference_circuit_open')
+            logger.warning("⚠️ Skipping Roboflow call: %s", e)
+            return None
+        except Exception as e:
+            logger.error("❌ Error calling Roboflow API: %s", e)
+            return None
+
+GEMINI_PROMPT = (
+    "This is an electricity meter reading image. "
+    "Please identify and extract any numbers that represent electricity consumption. "
+    "Look for patterns like 'KWh', 'units', or similar values. "
+    "Return ONLY the number you see, with 'KWh' unit if visible. "
+    "If no valid reading is found, return 'No KWh readings found'."
+)
+
+def extract_kwh_values(text):
+    """Extract KWh values from text using regex patterns."""
+    patterns = [
+        r'(\d+(?:\.\d+)?)\s*(?:KWh|kwh|kWh|kwH|KWH)\b',  # Matches: 1558kwh, 1558 KWh
+        r'(\d{4,})',  # Matches any 4+ digit number (likely a meter reading)
+        r'\b(\d+(?:\.\d+)?)\s*(?:units?)\b',  # Matches: 1558 units
+        r'(?:reading|consumption|value|number)[:=]?\s*(\d+(?:\.\d+)?)',  # Matches: reading: 1558
+    ]
+    
+    found_values = []
+    logger.debug("Searching text: %s", text)
+    for pattern in patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            try:
+                found_values.append(float(match.group(1)))
+            except ValueError as e:
+                logger.debug("Error converting match to float: %s", e)
+    
+    return found_values
+
+class GeminiBackend(DetectorBackend):
+    name = 'gemini'
+    max_concurrency = 4
+
+    def __init__(self, api_key, model_name='gemini-1.5-flash', prompt=GEMINI_PROMPT, cache=None,
+                 digit_confidence=None, jpeg_quality=95):
+        """Gemini vision model asked for the reading as text.
+
+        Gemini returns no boxes or scores, so the first value found in its
+        answer becomes one prediction per digit, each spanning an equal slice
+        of the image. Their confidence is unknown: predictions carry
+        `digit_confidence` (0.0 when None, so they never pass a confidence
+        gate) and the result is marked 'confidence_known': False, which
+        RoboflowMeterDetector.process_frame reads.
+        """
+        import google.generativeai as genai  # Deferred: only needed when this backend is used
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_name
+        self.prompt = prompt
+        self.cache = cache
+        self.digit_confidence = digit_confidence
+        self.jpeg_encoder = JpegEncoder(quality=jpeg_quality)
+
+    @property
+    def model_id(self):
+        return self.model_name
+
+    def encode(self, image):
+        """Return raw image file bytes (frames are JPEG encoded)."""
+        if isinstance(image, str):
+            with open(image, 'rb') as image_file:
+                return image_file.read()
+        if isinstance(image, (bytes, bytearray)):
+            return bytes(image)
+        return self.jpeg_encoder.encode(image).tobytes()
+
+    def infer(self, payload, confidence=0.1):
+        from PIL import Image
+        try:
+            img = Image.open(io.BytesIO(payload))
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            with metrics.timer('gemini_request'):
+                response = self.model.generate_content([self.prompt, img])
+            text = response.text
+        except Exception as e:
+            logger.error("❌ Error calling Gemini API: %s", e)
+            return None
+
+        logger.debug("Raw extracted text from Gemini: %s", text)
+        values = extract_kwh_values(text)
+        known = self.digit_confidence is not None
+        if not values or (known and self.digit_confidence < confidence):
+            return {'predictions': [], 'confidence_known': known}
+        digits = f"{values[0]:.0f}"
+        width, height = img.size
+        slot = width / len(digits)
+        return {'predictions': [{
+            'class': digit,
+            'x': (i + 0.5) * slot,
+            'y': height / 2,
+            'width': slot,
+            'height': height,
+            'confidence': self.digit_confidence if known else 0.0
+        } for i, digit in enumerate(digits)], 'confidence_known': known}
+
+# Segments in order a (top), b (top right), c (bottom right), d (bottom),
+# e (bottom left), f (top left), g (middle)
+SEGMENT_DIGITS = {
+    (1, 1, 1, 1, 1, 1, 0): '0',
+    (0, 1, 1, 0, 0, 0, 0): '1',
+    (1, 1, 0, 1, 1, 0, 1): '2',
+    (1, 1, 1, 1, 0, 0, 1): '3',
+    (0, 1, 1, 0, 0, 1, 1): '4',
+    (1, 0, 1, 1, 0, 1, 1): '5',
+    (1, 0, 1, 1, 1, 1, 1): '6',
+    (0, 0, 1, 1, 1, 1, 1): '6',  # 6 without the top bar
+    (1, 1, 1, 0, 0, 0, 0): '7',
+    (1, 1, 1, 0, 0, 1, 0): '7',  # 7 with the top-left bar
+    (1, 1, 1, 1, 1, 1, 1): '8',
+    (1, 1, 1, 1, 0, 1, 1): '9',
+    (1, 1, 1, 0, 0, 1, 1): '9',  # 9 without the bottom bar
+}
+
+# Sampling windows per segment as (x1, y1, x2, y2) fractions of the digit box
+SEGMENT_WINDOWS = (
+    (0.25, 0.00, 0.75, 0.15),  # a
+    (0.75, 0.15, 1.00, 0.45),  # b
+    (0.75, 0.55, 1.00, 0.85),  # c
+    (0.25, 0.85, 0.75, 1.00),  # d
+    (0.00, 0.55, 0.25, 0.85),  # e
+    (0.00, 0.15, 0.25, 0.45),  # f
+    (0.25, 0.43, 0.75, 0.57),  # g
+)
+
+class SevenSegmentBackend(DetectorBackend):
+    name = 'local'
+
+    def __init__(self, clahe_clip_limit=2.0, clahe_grid_size=(8, 8), blur_size=3,
+                 segment_on=0.45, min_height_ratio=0.5, one_aspect=0.35):
+        """CPU 7-segment decoder: enhance, threshold, split into digits, read segment masks.
+
+        Enhancement follows DOCUMENTATION_PREPROCESSING.txt (grayscale, noise
+        reduction, CLAHE, threshold) with a Gaussian blur instead of
+        fastNlMeansDenoising and Otsu instead of an 11px adaptive threshold,
+        which hollows out thick segments.
+        """
+        self.clahe_clip_limit = clahe_clip_limit
+        self.clahe_grid_size = clahe_grid_size
+        self.blur_size = blur_size
+        self.segment_on = segment_on
+        self.min_height_ratio = min_height_ratio
+        self.one_aspect = one_aspect
+
+    def encode(self, image):
+        """Decode an image path or encoded bytes to an ndarray; frames pass through."""
+        if not isinstance(image, (str, bytes, bytearray)):
+            return image
+        import cv2
+        import numpy as np
+        if isinstance(image, str):
+            decoded = cv2.imread(image)
+        else:
+            decoded = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR)
+        if decoded is None:
+            raise ValueError(f"Could not read image: {image if isinstance(image, str) else 'encoded bytes'}")
+        return decoded
+
+    def binarize(self, image):
+        """Return a binary mask where the digit segments are 255."""
+        import cv2  # Deferred so importing this module does not load OpenCV
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        if self.blur_size:
+            gray = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
+        clahe = cv2.createCLAHE(clipLimit=self.clahe_clip_limit, tileGridSize=self.clahe_grid_size)
+        gray = clahe.apply(gray)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Segments are the minority of pixels whether the display is LED or LCD
+        if cv2.countNonZero(binary) > binary.size / 2:
+            binary = cv2.bitwise_not(binary)
+        return binary
+
+    def digit_boxes(self, binary):
+        """Group segment blobs into digit boxes (x, y, w, h), left to right."""
+        import cv2
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        blobs = sorted(cv2.boundingRect(c) for c in contours)
+
+        # Segments of one digit overlap horizontally; merge them
+        merged = []
+        for x, y, w, h in blobs:
+            if merged:
+                mx, my, mw, mh = merged[-1]
+                overlap = min(mx + mw, x + w) - max(mx, x)
+                if overlap > 0.3 * min(mw, w):
+                    nx, ny = min(mx, x), min(my, y)
+                    merged[-1] = (nx, ny, max(mx + mw, x + w) - nx, max(my + mh, y + h) - ny)
+                    continue
+            merged.append((x, y, w, h))
+
+        if not merged:
+            return []
+        tallest = max(h for _, _, _, h in merged)
+        # Drop decimal points, specks and labels that are much shorter than the digits
+        return [b for b in merged if b[3] >= self.min_height_ratio * tallest]
+
+    def read_digit(self, binary, box):
+        """Return (digit, confidence) for one digit box, or (None, 0)."""
+        x, y, w, h = box
+        if w < self.one_aspect * h:
+            # Only the right-hand segments are lit: the box is a single bar
+            cell = binary[y:y + h, x:x + w]
+            return '1', float(cell.mean() / 255)
+
+        states = []
+        clarity = []
+        for x1, y1, x2, y2 in SEGMENT_WINDOWS:
+            window = binary[y + int(y1 * h):y + max(int(y2 * h), int(y1 * h) + 1),
+                            x + int(x1 * w):x + max(int(x2 * w), int(x1 * w) + 1)]
+            fill = float(window.mean() / 255) if window.size else 0.0
+            states.append(1 if fill >= self.segment_on else 0)
+            # How far the fill is from the on/off boundary, scaled to 0..1
+            clarity.append(min(1.0, abs(fill - self.segment_on) / self.segment_on))
+
+        digit = SEGMENT_DIGITS.get(tuple(states))
+        if digit is None:
+            return None, 0.0
+        return digit, sum(clarity) / len(clarity)
+
+    def infer(self, image, confidence=0.1):
+        with metrics.timer('local_decode'):
+            binary = self.binarize(image)
+            predictions = []
+            for box in self.digit_boxes(binary):
+                digit, score = self.read_digit(binary, box)
+                if digit is None or score < confidence:
+                    continue
+                x, y, w, h = box
+                predictions.append({
+                    'class': digit,
+                    'x': x + w / 2,
+                    'y': y + h / 2,
+                    'width': w,
+                    'height': h,
+                    'confidence': score
+                })
+        return {'predictions': predictions}
+
+class CascadeBackend(DetectorBackend):
+    name = 'cascade'
+
+    def __init__(self, primary, fallback, min_confidence=0.6, min_digits=1):
+        """Try `primary` (local) first; use `fallback` (hosted) only when it is unsure."""
+        self.primary = primary
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+        self.min_digits = min_digits
+
+    def infer(self, image, confidence=0.1):
+        result = self.primary.detect(image, confidence)
+        predictions = (result or {}).get('predictions') or []
+        if len(predictions) >= self.min_digits:
+            avg_confidence = sum(p['confidence'] for p in predictions) / len(predictions)
+            if avg_confidence >= self.min_confidence:
+                metrics.inc('backend_calls', backend=self.primary.name)
+                return result
+        metrics.inc('backend_calls', backend=self.fallback.name)
+        return self.fallback.detect(image, confidence)
+
+def _build_roboflow(base_url, api_key, model_id, jpeg_quality, cache, min_confidence):
+    return RoboflowBackend(base_url, api_key, jpeg_quality, cache=cache, model_id=model_id)
+
+def _build_local(base_url, api_key, model_id, jpeg_quality, cache, min_confidence):
+    return SevenSegmentBackend()
+
+def _build_cascade(base_url, api_key, model_id, jpeg_quality, cache, min_confidence):
+    if min_confidence is None:
+        min_confidence = float(os.getenv('LOCAL_MIN_CONFIDENCE', '0.6'))
+    hosted = RoboflowBackend(base_url, api_key, jpeg_quality, cache=cache, model_id=model_id)
+    return CascadeBackend(SevenSegmentBackend(), hosted, min_confidence)
+
+def _build_gemini(base_url, api_key, model_id, jpeg_quality, cache, min_confidence):
+    return GeminiBackend(os.getenv('GEMINI_API_KEY', ''), os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'),
+                         cache=cache, jpeg_quality=jpeg_quality)
+
+# DETECTOR_BACKEND name -> builder
+BACKENDS = {
+    'roboflow': _build_roboflow,
+    'local': _build_local,
+    'cascade': _build_cascade,
+    'gemini': _build_gemini,
+}
+
+def build_backend(kind, base_url, api_key, model_id=None, jpeg_quality=95, use_cache=True, min_confidence=None,
+                  cache=None):
+    """Build a detector backend by name (see BACKENDS).
+
+    'roboflow' is the hosted model, 'local' the CPU decoder, 'cascade' local
+    with hosted fallback and 'gemini' the Gemini vision model. Results go
+    through `cache`, or the process-wide cache when `use_cache` is set.
+    """
+    builder = BACKENDS.get(kind)
+    if builder is None:
+        raise ValueError(f"Unknown detector backend: {kind}")
+    if cache is None and use_cache:
+        cache = get_default_cache()
+    return builder(base_url, api_key, model_id, jpeg_quality, cache, min_confidence)
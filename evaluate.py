@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Evaluate - Compare detector configurations on a labeled manifest for accuracy, latency and API cost
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+
+from metrics import metrics, Histogram
+from frame_change import FrameChangeDetector
+from roi import RoiTracker
+from detector_backends import build_backend
+from roboflow_integration import RoboflowMeterDetector
+
+DEFAULT_EVAL_CONFIG = {
+    'name': 'default',
+    'backend': 'roboflow',
+    'confidence': 0.05,
+    'roi': True,
+    'max_width': 640,
+    'jpeg_quality': 95,
+    'skip_unchanged': True,
+    'min_confidence': None,
+}
+
+def load_manifest(path):
+    """Read a CSV manifest with columns video, timestamp (seconds) and reading."""
+    with open(path, newline='') as f:
+        rows = []
+        for row in csv.DictReader(f):
+            rows.append({
+                'video': row['video'],
+                'timestamp': float(row['timestamp']),
+                'reading': row['reading'].strip()
+            })
+    return rows
+
+def parse_config(spec):
+    """Parse 'backend=local,confidence=0.3,roi=0' into a config dict over the defaults."""
+    config = dict(DEFAULT_EVAL_CONFIG, name=spec)
+    for part in filter(None, spec.split(',')):
+        key, _, value = part.partition('=')
+        key = key.strip()
+        if key not in DEFAULT_EVAL_CONFIG:
+            raise ValueError(f"Unknown config key: {key}")
+        config[key] = value.strip()
+    return normalize_config(config)
+
+def normalize_config(config):
+    config = dict(DEFAULT_EVAL_CONFIG, **config)
+    config['confidence'] = float(config['confidence'])
+    config['roi'] = str(config['roi']).lower() not in ('0', 'false', 'no')
+    config['skip_unchanged'] = str(config['skip_unchanged']).lower() not in ('0', 'false', 'no')
+    config['max_width'] = int(config['max_width'])
+    config['jpeg_quality'] = int(config['jpeg_quality'])
+    if config['min_confidence'] is not None:
+        config['min_confidence'] = float(config['min_confidence'])
+    return config
+
+def build_detector(config, api_url, api_key, project_id, model_version):
+    """Detector for one config; the inference cache is off so every config pays its own way."""
+    base_url = f"{api_url.rstrip('/')}/{project_id}/{model_version}"
+    backend = build_backend(config['backend'], base_url, api_key, model_id=base_url,
+                            jpeg_quality=config['jpeg_quality'], use_cache=False,
+                            min_confidence=config['min_confidence'])
+    # A region is only learned above min_confidence, so an infinite one keeps full frames
+    roi_tracker = RoiTracker(max_width=config['max_width'],
+                             min_confidence=0.5 if config['roi'] else float('inf'))
+    # A negative threshold never matches, so every frame is inferred
+    change_detector = FrameChangeDetector() if config['skip_unchanged'] else FrameChangeDetector(threshold=-1.0)
+    return RoboflowMeterDetector(api_key, project_id, model_version, config['jpeg_quality'],
+                                 change_detector=change_detector, roi_tracker=roi_tracker,
+                                 backend=backend, api_url=api_url)
+
+def evaluate_config(manifest, config, api_url, api_key, project_id, model_version):
+    """Run one config over the manifest and return its summary row."""
+    detector = build_detector(config, api_url, api_key, project_id, model_version)
+    latency = Histogram(reservoir_size=max(1, len(manifest)))
+    bytes_before = metrics.get_counter('upload_bytes')
+    calls_before = metrics.snapshot('roboflow_request')['count']
+    correct = 0
+    try:
+        for row in manifest:
+            start = time.perf_counter()
+            result = detector.process_video_frame(row['video'], row['timestamp'], config['confidence'])
+            latency.observe(time.perf_counter() - start)
+            if result['success'] and result['reading'] == row['reading']:
+                correct += 1
+    finally:
+        detector.close()
+
+    frames = len(manifest)
+    return {
+        'config': config['name'],
+        'frames': frames,
+        'accuracy': correct / frames if frames else 0.0,
+        'mean_ms': latency.sum / frames * 1000 if frames else 0.0,
+        'p95_ms': latency.quantile(0.95) * 1000,
+        'bytes_uploaded': int(metrics.get_counter('upload_bytes') - bytes_before),
+        'api_calls': metrics.snapshot('roboflow_request')['count'] - calls_before,
+    }
+
+def print_table(rows):
+    print(f"\n{'config':<40} {'frames':>6} {'accuracy':>8} {'mean ms':>8} {'p95 ms':>8} {'KB up':>8} {'API calls':>9}")
+    for row in rows:
+        print(f"{row['config'][:40]:<40} {row['frames']:>6} {row['accuracy']:>8.1%} {row['mean_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['bytes_uploaded'] / 1024:>8.1f} {row['api_calls']:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate detector configurations against a labeled manifest")
+    parser.add_argument("manifest", help="CSV with columns video, timestamp, reading")
+    parser.add_argument("--config", action="append", default=[],
+                        help="Config as key=value pairs, e.g. 'backend=local,confidence=0.3'; repeatable")
+    parser.add_argument("--configs", help="JSON file with a list of config objects")
+    parser.add_argument("--target", type=float, help="Accuracy target (0-1); reports the fastest config meeting it")
+    parser.add_argument("--output", help="Write the summary table to this CSV file")
+    parser.add_argument("--api_url", default=os.getenv("ROBOFLOW_API_URL", "https://detect.roboflow.com"))
+    parser.add_argument("--api_key", default=os.getenv("ROBOFLOW_API_KEY"), help="Defaults to ROBOFLOW_API_KEY")
+    parser.add_argument("--project_id", default=os.getenv("ROBOFLOW_PROJECT_ID", "7-segments-custom-hblhp"))
+    parser.add_argument("--model_version", default=os.getenv("ROBOFLOW_MODEL_VERSION", "6"))
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    configs = [parse_config(spec) for spec in args.config]
+    if args.configs:
+        with open(args.configs) as f:
+            configs += [normalize_config(c) for c in json.load(f)]
+    if not configs:
+        configs = [dict(DEFAULT_EVAL_CONFIG)]
+    if not args.api_key and any(c['backend'] in ('roboflow', 'cascade') for c in configs):
+        parser.error("No Roboflow API key: set ROBOFLOW_API_KEY or pass --api_key "
+                     "(only backend=local runs without one)")
+
+    print(f"🧪 Evaluating {len(configs)} config(s) on {len(manifest)} labeled frames")
+    rows = [evaluate_config(manifest, config, args.api_url, args.api_key, args.project_id, args.model_version)
+            for config in configs]
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n💾 Results saved to: {args.output}")
+
+    if args.target is not None:
+        passing = [row for row in rows if row['accuracy'] >= args.target]
+        if passing:
+            best = min(passing, key=lambda row: row['mean_ms'])
+            print(f"\n🏆 Fastest config meeting {args.target:.0%}: {best['config']} ({best['mean_ms']:.1f} ms/frame)")
+        else:
+            print(f"\n⚠️  No config meets the {args.target:.0%} accuracy target")
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,94 @@
+import argparse
 import os
-import pathlib
-import re
-from PIL import Image
-import base64
-import google.generativeai as genai
-from google.generativeai import types
 from dotenv import load_dotenv
-import time
+from detector_backends import GeminiBackend, digit_confidences
+from folder_watcher import FolderProcessor, ImageManifest
+from inference_cache import get_default_cache
 
 # Load environment variables from .env file
 load_dotenv()
 
-def setup_gemini():
-    """Initialize Gemini API with the API key."""
+def setup_gemini(cache=None):
+    """Initialize the Gemini detector backend with the API key.
+
+    Results go through `cache` (an InferenceCache), or the process-wide cache when it is None.
+    """
     api_key = os.getenv("GEMINI_API_KEY", "mwY8QAFFdfiIyLG57bQK")  # Use provided API key as fallback
     if not api_key:
         raise ValueError("Please set GEMINI_API_KEY in the .env file")
-    genai.configure(api_key=api_key)
-    return genai.GenerativeModel('gemini-1.5-flash')  # Using the suggested model
+    # Results are cached by image content, like the Roboflow paths
+    return GeminiBackend(api_key, os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+                         cache=cache if cache is not None else get_default_cache())
 
-def extract_kwh_values(text):
-    """Extract KWh values from text using regex patterns."""
-    patterns = [
-        r'(\d+(?:\.\d+)?)\s*(?:KWh|kwh|kWh|kwH|KWH)\b',  # Matches: 1558kwh, 1558 KWh
-        r'(\d{4,})',  # Matches any 4+ digit number (likely a meter reading)
-        r'\b(\d+(?:\.\d+)?)\s*(?:units?)\b',  # Matches: 1558 units
-        r'(?:reading|consumption|value|number)[:=]?\s*(\d+(?:\.\d+)?)',  # Matches: reading: 1558
-    ]
-    
-    found_values = []
-    print(f"\nSearching text: {text}")  # Debug print
-    for pattern in patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        for match in matches:
-            try:
-                value = float(match.group(1))
-                print(f"Found match with pattern '{pattern}': {value}")  # Debug print
-                found_values.append(value)
-            except ValueError as e:
-                print(f"Error converting match to float: {e}")
-    
-    return found_values
+class ExtractionError(Exception):
+    """The image could not be read or the Gemini call failed; the image should be retried."""
 
-def process_image(model, image_path):
-    """Extract KWh readings from an image using Gemini Vision."""
+def process_image(backend, image_path):
+    """Extract KWh readings from an image using Gemini Vision.
+
+    Returns "No KWh readings found" when Gemini answered without a reading,
+    and raises ExtractionError when the image or the API call failed.
+    """
+    print(f"\nProcessing image: {image_path}")
     try:
-        print(f"\nProcessing image: {image_path}")
-        
-        # Open and convert image
-        img = Image.open(image_path)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-            
-        prompt = (
-            "This is an electricity meter reading image. "
-            "Please identify and extract any numbers that represent electricity consumption. "
-            "Look for patterns like 'KWh', 'units', or similar values. "
-            "Return ONLY the number you see, with 'KWh' unit if visible. "
-            "If no valid reading is found, return 'No KWh readings found'."
-        )
-        
-        response = model.generate_content([prompt, img])
-        extracted_text = response.text
-        print(f"Raw extracted text from Gemini: {extracted_text}")  # Debug print
-        
-        # Extract KWh values from the response
-        kwh_values = extract_kwh_values(extracted_text)
-        print(f"All found KWh values: {kwh_values}")  # Debug print
-        
-        if not kwh_values:
-            print("No KWh values found in the text")  # Debug print
-            return "No KWh readings found"
-        
-        # Return the first valid reading found
-        return f"{kwh_values[0]:.0f} KWh"
-        
+        detections = backend.detect(image_path)
     except Exception as e:
         print(f"Error processing image: {str(e)}")
+        raise ExtractionError(str(e)) from e
+    if detections is None:
+        # The backend logged the API error; nothing was learned about this image
+        print("Error processing image: Gemini request failed")
+        raise ExtractionError("Gemini request failed")
+    
+    digits = digit_confidences(detections)
+    if not digits:
+        print("No KWh values found in the text")  # Debug print
         return "No KWh readings found"
+    
+    # Return the first valid reading found
+    return f"{''.join(digit for digit, _ in digits)} KWh"
+
+def save_result(image_path, reading):
+    """Report an extraction.
+
+    The manifest keeps it in processed_images.reading; the app's readings
+    table only holds billed deltas, so absolute readings stay out of it.
+    """
+    print(f"Reading for {os.path.basename(image_path)}: {reading}")
 
 def main():
-    """Main function for testing."""
+    """Watch the input folder and extract each new image's reading once."""
+    parser = argparse.ArgumentParser(description="Extract meter readings from images dropped into a folder")
+    parser.add_argument("--input", default="input", help="Folder to watch for .jpg images")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("EXTRACT_WORKERS", "4")),
+                        help="Parallel Gemini requests")
+    parser.add_argument("--rate", type=float, default=float(os.getenv("EXTRACT_RATE", "1.0")),
+                        help="Maximum Gemini requests per second")
+    parser.add_argument("--interval", type=float, default=5.0, help="Polling interval when inotify is unavailable")
+    args = parser.parse_args()
+
+    processor = None
     try:
         # Initialize Gemini
-        model = setup_gemini()
+        backend = setup_gemini()
         print("Model initialized successfully")
         
-        # Process all images in input directory
-        input_dir = 'input'
-        if not os.path.exists(input_dir):
-            os.makedirs(input_dir)
-            
-        while True:
-            for filename in os.listdir(input_dir):
-                if filename.endswith('.jpg'):
-                    image_path = os.path.join(input_dir, filename)
-                    print(f"\nProcessing {filename}...")
-                    reading = process_image(model, image_path)
-                    print(f"Reading: {reading}")
-            
-            time.sleep(5)  # Wait 5 seconds before checking again
+        processor = FolderProcessor(
+            args.input,
+            lambda image_path: process_image(backend, image_path),
+            ImageManifest(),
+            workers=args.workers,
+            rate=args.rate,
+            on_result=save_result,
+            interval=args.interval
+        )
+        print(f"Watching {args.input} ({args.workers} workers, {args.rate:g} req/s)")
+        processor.run()
             
     except KeyboardInterrupt:
         print("\nStopping...")
+        if processor is not None:
+            processor.stop()
     except Exception as e:
         print(f"Error in main: {str(e)}")
 
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Folder Watcher - Process each new image in a folder once, with inotify (or polling), a hash manifest and a bounded pool
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import select
+import sqlite3
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+from rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+class InotifyWatcher:
+    def __init__(self, directory):
+        """Report files that finish being written to, or are moved into, `directory` (Linux only)."""
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def poll(self, timeout):
+        """Return names of files completed within `timeout` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    def __init__(self, directory, interval=5.0):
+        """Fallback: list the folder every `interval` seconds.
+
+        A file is reported once its size and mtime stay the same across two
+        listings, so half-written files are not picked up.
+        """
+        self.directory = directory
+        self.interval = interval
+        self._seen = {}      # name -> (size, mtime) at the last listing
+        self._reported = {}  # name -> (size, mtime) when last reported
+        self._next = 0.0
+
+    def poll(self, timeout):
+        wait = self._next - time.monotonic()
+        if wait > 0:
+            time.sleep(min(timeout, wait))
+            if time.monotonic() < self._next:
+                return []
+        self._next = time.monotonic() + self.interval
+        names = []
+        current = {}
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            current[entry.name] = (stat.st_size, stat.st_mtime)
+            stable = self._seen.get(entry.name) == current[entry.name]
+            if stable and self._reported.get(entry.name) != current[entry.name]:
+                self._reported[entry.name] = current[entry.name]
+                names.append(entry.name)
+        self._seen = current
+        return names
+
+    def close(self):
+        pass
+
+def make_watcher(directory, interval=5.0):
+    """Prefer inotify; fall back to polling where it is unavailable."""
+    try:
+        return InotifyWatcher(directory)
+    except (OSError, AttributeError) as e:
+        logger.info("Using polling watcher for %s (%s)", directory, e)
+        return PollingWatcher(directory, interval)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ImageManifest:
+    def __init__(self, db_path='readings.db'):
+        """Content hashes of images that have been processed, with their result."""
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS processed_images (
+                hash TEXT PRIMARY KEY,
+                path TEXT,
+                reading TEXT,
+                processed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._conn.commit()
+        self._in_flight = set()
+
+    def claim(self, digest):
+        """Return True if this content is new and not already being processed."""
+        with self._lock:
+            if digest in self._in_flight:
+                return False
+            row = self._conn.execute('SELECT 1 FROM processed_images WHERE hash = ?', (digest,)).fetchone()
+            if row is not None:
+                return False
+            self._in_flight.add(digest)
+            return True
+
+    def complete(self, digest, path, reading):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO processed_images (hash, path, reading) VALUES (?, ?, ?)',
+                               (digest, path, reading))
+            self._conn.commit()
+            self._in_flight.discard(digest)
+
+    def release(self, digest):
+        """Give up a claim without recording it, so the image is retried later."""
+        with self._lock:
+            self._in_flight.discard(digest)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class FolderProcessor:
+    def __init__(self, directory, process_fn, manifest, workers=4, rate=1.0, extensions=('.jpg',),
+                 on_result=None, interval=5.0):
+        """Run process_fn(path) once per new image content in `directory`.
+
+        At most `workers` calls run at once, paced to `rate` calls per second;
+        on_result(path, result) is called with each result.
+        """
+        self.directory = directory
+        self.process_fn = process_fn
+        self.manifest = manifest
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.extensions = tuple(extensions)
+        self.on_result = on_result
+        self.interval = interval
+        self._slots = threading.BoundedSemaphore(workers * 2)
+        self._stop = threading.Event()
+
+    def _process(self, path, digest):
+        try:
+            self.bucket.acquire()
+            with metrics.timer('folder_image'):
+                result = self.process_fn(path)
+        except Exception as e:
+            # Not recorded as processed, so a restart or a rewrite of the file tries again
+            logger.error("❌ Failed to process %s: %s", path, e)
+            self.manifest.release(digest)
+            metrics.inc('folder_images_failed')
+            return
+        finally:
+            self._slots.release()
+        self.manifest.complete(digest, path, result)
+        metrics.inc('folder_images_processed')
+        if self.on_result is not None:
+            self.on_result(path, result)
+
+    def submit(self, executor, name):
+        """Hash a file and queue it unless its content was already processed."""
+        if not name.lower().endswith(self.extensions):
+            return False
+        path = os.path.join(self.directory, name)
+        try:
+            digest = file_hash(path)
+        except OSError:
+            return False  # Removed or renamed before we got to it
+        if not self.manifest.claim(digest):
+            metrics.inc('folder_images_skipped')
+            return False
+        # Bound queued work: wait while too many images are pending
+        self._slots.acquire()
+        executor.submit(self._process, path, digest)
+        return True
+
+    def run(self):
+        """Process existing images, then new ones as they arrive, until stop()."""
+        os.makedirs(self.directory, exist_ok=True)
+        watcher = make_watcher(self.directory, self.interval)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # Files already in the folder (inotify only reports new ones)
+                for name in sorted(os.listdir(self.directory)):
+                    self.submit(executor, name)
+                while not self._stop.is_set():
+                    for name in watcher.poll(timeout=1.0):
+                        self.submit(executor, name)
+        finally:
+            watcher.close()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Frame Archive - Content-addressed thumbnails of detection frames in append-only pack files
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+
+from frame_encoding import JpegEncoder
+
+logger = logging.getLogger(__name__)
+
+class FrameArchive:
+    def __init__(self, directory='frame_archive', pack_max_bytes=64 * 1024 * 1024, max_side=320, jpeg_quality=80):
+        """Store downscaled JPEGs back to back in pack files, indexed by content hash.
+
+        Frames are resized so their longer side is at most `max_side` pixels.
+        Packs are only ever appended to; a new one starts once the current one
+        reaches `pack_max_bytes`. index.db maps each id to (pack, offset,
+        length), and reads go through a memory map of the pack.
+        """
+        self.directory = directory
+        self.pack_max_bytes = pack_max_bytes
+        self.max_side = max_side
+        self.encoder = JpegEncoder(quality=jpeg_quality)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS frames (
+                id TEXT PRIMARY KEY,
+                pack INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._conn.commit()
+        last = self._conn.execute('SELECT MAX(pack) FROM frames').fetchone()[0]
+        self._pack = last or 1
+        self._writer = open(self._pack_path(self._pack), 'ab')
+        self._maps = {}  # pack number -> mmap, remapped when the pack has grown
+
+    def _pack_path(self, pack):
+        return os.path.join(self.directory, f"pack-{pack:06d}.dat")
+
+    def thumbnail(self, frame, roi=None):
+        """Crop to `roi` (x, y, w, h) when given and shrink to max_side."""
+        import cv2  # Deferred so importing this module does not load OpenCV
+        if roi is not None:
+            x, y, w, h = roi
+            frame = frame[y:y + h, x:x + w]
+        height, width = frame.shape[:2]
+        scale = self.max_side / max(height, width)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return frame
+
+    def put(self, frame, roi=None):
+        """Archive a frame (or its ROI) and return its id; identical thumbnails are stored once."""
+        data = self.encoder.encode(self.thumbnail(frame, roi)).tobytes()
+        frame_id = hashlib.sha256(data).hexdigest()[:32]
+        with self._lock:
+            if self._conn.execute('SELECT 1 FROM frames WHERE id = ?', (frame_id,)).fetchone():
+                return frame_id
+            if self._writer.tell() and self._writer.tell() + len(data) > self.pack_max_bytes:
+                self._writer.close()
+                self._pack += 1
+                self._writer = open(self._pack_path(self._pack), 'ab')
+            offset = self._writer.tell()
+            self._writer.write(data)
+            self._writer.flush()
+            # The bytes are in the pack before the index points at them
+            self._conn.execute('INSERT INTO frames (id, pack, offset, length) VALUES (?, ?, ?, ?)',
+                               (frame_id, self._pack, offset, len(data)))
+            self._conn.commit()
+        return frame_id
+
+    def _map(self, pack, end):
+        """Return a memory map of `pack` covering at least `end` bytes."""
+        mapped = self._maps.get(pack)
+        if mapped is None or len(mapped) < end:
+            with open(self._pack_path(pack), 'rb') as f:
+                new_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if mapped is not None:
+                mapped.close()
+            self._maps[pack] = mapped = new_map
+        return mapped
+
+    def get(self, frame_id):
+        """Return the JPEG bytes for an id, or None if it is not archived."""
+        with self._lock:
+            row = self._conn.execute('SELECT pack, offset, length FROM frames WHERE id = ?', (frame_id,)).fetchone()
+            if row is None:
+                return None
+            pack, offset, length = row
+            return self._map(pack, offset + length)[offset:offset + length]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM frames').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._writer.close()
+            self._conn.close()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Frame Change Detection - Cheap pre-filter that skips inference when the meter display is unchanged
+"""
+
+import threading
+
+class FrameChangeDetector:
+    def __init__(self, size=(64, 32), threshold=2.0, method='diff', hash_distance=3):
+        """Compare frames on a small grayscale thumbnail of the digit region.
+
+        method='diff' uses the mean absolute pixel difference (0-255) against
+        `threshold`; method='dhash' uses a difference hash and allows up to
+        `hash_distance` differing bits.
+        """
+        self.size = size
+        self.threshold = threshold
+        self.method = method
+        self.hash_distance = hash_distance
+        self._last = {}  # source -> (signature, roi) of the last inferred frame
+        self._lock = threading.Lock()
+
+    def thumbnail(self, frame, roi=None):
+        """Crop to the ROI (x, y, w, h) if given, then downscale to grayscale."""
+        import cv2  # Deferred so importing this module does not load OpenCV
+        if roi is not None:
+            x, y, w, h = roi
+            frame = frame[y:y + h, x:x + w]
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+
+    def signature(self, frame, roi=None):
+        small = self.thumbnail(frame, roi)
+        if self.method == 'dhash':
+            return dhash(small)
+        return small.astype('float32')
+
+    def distance(self, a, b):
+        if self.method == 'dhash':
+            return bin(a ^ b).count('1')
+        return float(abs(a - b).mean())
+
+    def is_unchanged(self, source, frame):
+        """Return True if the frame matches the last inferred frame of `source`.
+
+        The comparison uses the region that was recorded with that frame.
+        """
+        with self._lock:
+            last = self._last.get(source)
+        if last is None:
+            return False
+        previous, roi = last
+        current = self.signature(frame, roi)
+        if not _same_shape(previous, current):
+            return False
+        limit = self.hash_distance if self.method == 'dhash' else self.threshold
+        return self.distance(previous, current) <= limit
+
+    def remember(self, source, frame, roi=None):
+        """Record `frame` as the last frame that was actually inferred."""
+        current = self.signature(frame, roi)
+        with self._lock:
+            self._last[source] = (current, roi)
+
+    def forget(self, source=None):
+        with self._lock:
+            if source is None:
+                self._last.clear()
+            else:
+                self._last.pop(source, None)
+
+def _same_shape(a, b):
+    return getattr(a, 'shape', None) == getattr(b, 'shape', None)
+
+def dhash(gray):
+    """64-bit difference hash of a grayscale image."""
+    import cv2
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
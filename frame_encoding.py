@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Frame Encoding - In-memory JPEG/base64 encoding of frames for inference uploads
+"""
+
+import base64
+
+class JpegEncoder:
+    def __init__(self, quality=95):
+        """Encode ndarray frames to JPEG in memory at the given quality (1-100)."""
+        self.quality = int(quality)
+        self._params = None  # imencode params, built once and reused
+
+    def _encode_params(self):
+        if self._params is None:
+            import cv2  # Deferred so importing this module does not load OpenCV
+            self._params = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+        return self._params
+
+    def encode(self, frame):
+        """Return the JPEG-encoded frame as a uint8 buffer."""
+        import cv2
+        ok, buffer = cv2.imencode('.jpg', frame, self._encode_params())
+        if not ok:
+            raise ValueError("Could not encode frame as JPEG")
+        # No copy to bytes: base64 and hashlib read the array through the buffer protocol
+        return buffer
+
+    def encode_base64(self, frame):
+        """Return the base64 payload for a frame, ready to POST."""
+        return base64.b64encode(self.encode(frame))
+
+def encode_image(image, encoder=None):
+    """Encode a file path, already-encoded bytes or an ndarray frame to a base64 payload."""
+    if isinstance(image, str):
+        with open(image, "rb") as image_file:
+            return base64.b64encode(image_file.read())
+    if isinstance(image, (bytes, bytearray)):
+        return base64.b64encode(image)
+    return (encoder or JpegEncoder()).encode_base64(image)
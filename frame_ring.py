@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Frame Ring - Fixed-size shared-memory frame slots passed between processes by descriptor
+"""
+
+import logging
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+# Room for one 1080p BGR frame
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3
+
+def _attach(name):
+    """Open an existing block; only the creating process unlinks it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Child processes share the creator's resource tracker, where the name is already registered
+        return shared_memory.SharedMemory(name=name)
+
+class FrameRing:
+    def __init__(self, slots=4, slot_bytes=DEFAULT_SLOT_BYTES, context=None):
+        """Create `slots` frame buffers of `slot_bytes` each in one shared memory block.
+
+        A writer acquire()s a free slot, write()s a frame into it and sends
+        the returned descriptor (slot, shape, dtype) to the reader, which
+        view()s it as an ndarray without copying and release()s the slot when
+        done. Free slots travel on a queue, so each slot has one owner at a
+        time. The ring can be passed to a child process as an argument.
+        """
+        context = context or multiprocessing.get_context('spawn')
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._owner = True
+        self._free = context.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __getstate__(self):
+        return {'name': self._shm.name, 'slots': self.slots, 'slot_bytes': self.slot_bytes, 'free': self._free}
+
+    def __setstate__(self, state):
+        self.slots = state['slots']
+        self.slot_bytes = state['slot_bytes']
+        self._free = state['free']
+        self._shm = _attach(state['name'])
+        self._owner = False
+
+    def acquire(self, timeout=0):
+        """Return a free slot index, or None if none frees up within `timeout` seconds."""
+        try:
+            if timeout:
+                return self._free.get(timeout=timeout)
+            return self._free.get_nowait()
+        except queue.Empty:
+            return None
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def write(self, slot, frame):
+        """Copy `frame` into `slot` and return its descriptor."""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+        import numpy as np  # Deferred so importing this module (and the app) does not load NumPy
+        target = np.ndarray(frame.shape, frame.dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        target[...] = frame
+        return (slot, frame.shape, frame.dtype.str)
+
+    def view(self, descriptor):
+        """Return the frame a descriptor points at, as an ndarray over shared memory (no copy).
+
+        The view is only valid until the slot is released.
+        """
+        import numpy as np
+        slot, shape, dtype = descriptor
+        return np.ndarray(shape, np.dtype(dtype), buffer=self._shm.buf, offset=slot * self.slot_bytes)
+
+    def close(self):
+        """Detach from the block; the creating process also frees it."""
+        try:
+            self._shm.close()
+        except BufferError:
+            # A frame view is still referenced somewhere; the mapping goes when it does
+            logger.debug("Frame ring %s still has live views", self._shm.name)
+        if self._owner:
+            self._shm.unlink()
+            self._owner = False
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Frame Sampler - Stream sampled frames from a video one at a time in constant memory
+"""
+
+import itertools
+
+from video_decoder import VideoDecoder
+
+def sample_indices(frame_count, fps, count=None, interval=None, every=None):
+    """Yield the frame indices to sample, in increasing order.
+
+    Exactly one policy is used: `count` frames spread evenly from the first
+    to the last frame, one frame every `interval` seconds, or every `every`-th
+    frame. With an unknown `frame_count` (0) the interval and every-k policies
+    run until the video ends.
+    """
+    if sum(p is not None for p in (count, interval, every)) != 1:
+        raise ValueError("Choose exactly one of count, interval or every")
+
+    if count is not None:
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        if frame_count <= 0:
+            raise ValueError("count needs a known frame count")
+        if count == 1:
+            yield 0
+            return
+        last = -1
+        for i in range(count):
+            index = round(i * (frame_count - 1) / (count - 1))
+            if index != last:  # Short videos: never yield the same frame twice
+                yield index
+                last = index
+        return
+
+    if interval is not None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        steps = (int(round(i * interval * fps)) for i in itertools.count())
+    else:
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        steps = (i * every for i in itertools.count())
+
+    last = -1
+    for index in steps:
+        if frame_count > 0 and index >= frame_count:
+            return
+        if index != last:
+            yield index
+            last = index
+
+def iter_frames(video_path, count=None, interval=None, every=None, max_forward_seconds=2.0):
+    """Yield (frame_number, timestamp_ms, frame) for the sampled frames of a video.
+
+    Frames are decoded in order: short gaps are read through, gaps longer than
+    `max_forward_seconds` seek, which lets the container start from the
+    nearest keyframe. Only one decoded frame is held at a time.
+    """
+    decoder = VideoDecoder(video_path, cache_size=0, max_forward_seconds=max_forward_seconds)
+    try:
+        for index in sample_indices(decoder.frame_count, decoder.fps, count, interval, every):
+            try:
+                frame = decoder.read_frame(index)
+            except ValueError:
+                # Container frame counts can be estimates; stop at the real end
+                break
+            yield index, index * 1000.0 / decoder.fps, frame
+    finally:
+        decoder.close()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Inference Cache - Content-addressed, size-bounded SQLite cache of detection results
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class InferenceCache:
+    def __init__(self, path='inference_cache.db', max_bytes=64 * 1024 * 1024):
+        """Open (or create) the cache; least recently used entries go once `max_bytes` is exceeded."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS inference_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_inference_cache_last_used ON inference_cache (last_used)')
+        self._conn.commit()
+        self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM inference_cache').fetchone()[0]
+
+    @staticmethod
+    def make_key(payload, model_id, confidence, overlap=0.5):
+        """Key a result by the encoded image bytes and every parameter that changes the answer."""
+        digest = hashlib.sha256(payload).hexdigest()
+        return f"{digest}:{model_id}:{confidence:g}:{overlap:g}"
+
+    def get(self, key):
+        """Return the cached result for `key`, or None."""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM inference_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE inference_cache SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """Store a result and evict the least recently used entries if over budget."""
+        data = json.dumps(value)
+        size = len(key) + len(data)
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM inference_cache WHERE key = ?', (key,)).fetchone()
+            self._conn.execute('INSERT OR REPLACE INTO inference_cache (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+                               (key, data, size, time.time()))
+            self._total += size - (old[0] if old else 0)
+            while self._total > self.max_bytes:
+                victim = self._conn.execute(
+                    'SELECT key, size FROM inference_cache ORDER BY last_used LIMIT 1').fetchone()
+                if victim is None:
+                    break
+                self._conn.execute('DELETE FROM inference_cache WHERE key = ?', (victim[0],))
+                self._total -= victim[1]
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM inference_cache').fetchone()[0]
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_default_cache():
+    """Return the process-wide cache configured by INFERENCE_CACHE_PATH / INFERENCE_CACHE_MAX_MB.
+
+    Returns None when INFERENCE_CACHE_PATH is set to an empty string.
+    """
+    global _default_cache
+    path = os.getenv('INFERENCE_CACHE_PATH', 'inference_cache.db')
+    if not path:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            max_mb = float(os.getenv('INFERENCE_CACHE_MAX_MB', '64'))
+            _default_cache = InferenceCache(path, int(max_mb * 1024 * 1024))
+        return _default_cache
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Inference Client - Pooled, retrying HTTP client with a circuit breaker for Roboflow calls
+"""
+
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class InferenceError(Exception):
+    """The inference service returned an error or could not be reached."""
+
+class CircuitOpenError(InferenceError):
+    """The circuit breaker is open; the call was not attempted."""
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """Open after `failure_threshold` consecutive failures, probe again after `reset_timeout` seconds."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Return True if a call may go through (closed, or the single half-open probe)."""
+        with self._lock:
+            state = self._state()
+            if state != 'half_open':
+                return state == 'closed'
+            now = time.monotonic()
+            # One probe at a time; one that never reports back is replaced after reset_timeout
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_started = None
+            if self.failures >= self.failure_threshold or self._state() == 'half_open':
+                self.opened_at = time.monotonic()
+
+_shared_session = None
+_shared_breakers = {}
+_shared_lock = threading.Lock()
+
+def get_shared_session(pool_size=10):
+    """Return the process-wide keep-alive session used by all inference clients."""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            # Retries are handled by InferenceClient so they can be jittered and counted
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _shared_session = session
+        return _shared_session
+
+def get_shared_breaker(base_url):
+    """Return the circuit breaker shared by every client of one endpoint."""
+    with _shared_lock:
+        breaker = _shared_breakers.get(base_url)
+        if breaker is None:
+            breaker = _shared_breakers[base_url] = CircuitBreaker()
+        return breaker
+
+class InferenceClient:
+    def __init__(self, base_url, api_key, connect_timeout=3.05, read_timeout=15.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, session=None, breaker=None):
+        """Initialize a client for one hosted model endpoint."""
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = session or get_shared_session()
+        self.breaker = breaker or get_shared_breaker(base_url)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, honouring Retry-After when given."""
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def infer(self, image_data, confidence, overlap=0.5):
+        """POST a base64 image and return the predictions JSON.
+
+        Raises CircuitOpenError while the service is considered down and
+        InferenceError once retries are exhausted or on a non-retryable error.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {self.base_url}")
+
+        params = {
+            "api_key": self.api_key,
+            "confidence": confidence,
+            "overlap": overlap
+        }
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.post(
+                    self.base_url,
+                    params=params,
+                    data=image_data,
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = InferenceError(f"Request failed: {e}")
+            else:
+                if response.status_code == 200:
+                    try:
+                        result = response.json()
+                    except ValueError as e:
+                        # A truncated or non-JSON body counts as a failed attempt
+                        last_error = InferenceError(f"Malformed response: {e}")
+                    else:
+                        self.breaker.record_success()
+                        return result
+                else:
+                    last_error = InferenceError(f"API Error: {response.status_code} - {response.text[:200]}")
+                    if response.status_code not in RETRYABLE_STATUS:
+                        # Bad request or bad key: retrying will not help, and the service is up
+                        self.breaker.record_success()
+                        raise last_error
+                    retry_after = response.headers.get('Retry-After')
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.debug("Retrying inference in %.2fs (attempt %d): %s", delay, attempt + 1, last_error)
+                time.sleep(delay)
+
+        self.breaker.record_failure()
+        raise last_error
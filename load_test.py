@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Load Test - Drive the detection and polling endpoints of a running app and report latency percentiles
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+from metrics import Histogram
+
+# Polling endpoints and periods (seconds), as the browser pages use them
+TAB_POLLS = (
+    ('/get_status', 1.0),
+    ('/get_reading', 2.0),
+    ('/get_readings', 2.0),
+)
+DASHBOARD_POLLS = (
+    ('/get_dashboard_data', 30.0),
+    ('/get_alerts', 30.0),
+)
+
+class LoadStats:
+    def __init__(self):
+        """Per-endpoint latency histograms and error counts."""
+        self._lock = threading.Lock()
+        self.latency = {}  # endpoint -> Histogram
+        self.errors = {}   # endpoint -> int
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = Histogram(reservoir_size=100000)
+            histogram.observe(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+def timed_call(session, stats, method, base_url, endpoint, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = session.request(method, base_url + endpoint, timeout=30, **kwargs)
+        ok = response.status_code < 400
+    except requests.RequestException:
+        ok = False
+    stats.record(endpoint, time.perf_counter() - start, ok)
+
+class VideoClock:
+    def __init__(self, tick):
+        """Video time of the app's single meter, shared by every client that posts it."""
+        self.tick = tick
+        self._lock = threading.Lock()
+        self._time = 0.0
+
+    def advance(self):
+        with self._lock:
+            self._time += self.tick
+            return self._time
+
+def run_meter_client(base_url, stats, stop, clock, speed):
+    """One client of the meter: post the next video time every `tick` video seconds.
+
+    The app tracks one meter, so every client advances the same clock and the
+    posted times never go backwards (which would reset sampling and fusion).
+    """
+    session = requests.Session()
+    while not stop.is_set():
+        timed_call(session, stats, 'POST', base_url, '/update_video_time',
+                   json={'video_time': clock.advance()})
+        stop.wait(clock.tick / speed)
+
+def run_tab(base_url, stats, stop, speed, dashboard):
+    """One browser tab: poll each endpoint on its own period."""
+    session = requests.Session()
+    polls = list(TAB_POLLS)
+    if dashboard:
+        session.post(base_url + '/login', data={'email': 'admin', 'password': '1234'}, timeout=30)
+        polls += DASHBOARD_POLLS
+    next_due = {endpoint: time.monotonic() for endpoint, _ in polls}
+    while not stop.is_set():
+        now = time.monotonic()
+        for endpoint, period in polls:
+            if now >= next_due[endpoint]:
+                timed_call(session, stats, 'GET', base_url, endpoint)
+                next_due[endpoint] = now + period / speed
+        stop.wait(max(0.0, min(next_due.values()) - time.monotonic()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the detection and polling endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL of the running app")
+    parser.add_argument("--clients", type=int, default=5,
+                        help="Concurrent clients posting video time for the app's single meter")
+    parser.add_argument("--tabs", type=int, default=20, help="Simulated tabs polling status endpoints")
+    parser.add_argument("--duration", type=float, default=30, help="Test length in seconds")
+    parser.add_argument("--tick", type=float, default=5.0, help="Video seconds between video time updates")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed; >1 compresses the schedule")
+    parser.add_argument("--dashboard", action="store_true", help="Log tabs in and poll dashboard endpoints too")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    requests.post(base_url + '/start_process', timeout=30)
+
+    stats = LoadStats()
+    stop = threading.Event()
+    clock = VideoClock(args.tick)
+    threads = [threading.Thread(target=run_meter_client, args=(base_url, stats, stop, clock, args.speed), daemon=True)
+               for _ in range(args.clients)]
+    threads += [threading.Thread(target=run_tab, args=(base_url, stats, stop, args.speed, args.dashboard), daemon=True)
+                for _ in range(args.tabs)]
+
+    print(f"🚦 Load test: 1 meter with {args.clients} clients, {args.tabs} tabs for {args.duration:g}s against {base_url}")
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'endpoint':<22} {'requests':>8} {'req/s':>7} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, histogram in sorted(stats.latency.items()):
+        print(f"{endpoint:<22} {histogram.count:>8} {histogram.count / elapsed:>7.1f} "
+              f"{stats.errors.get(endpoint, 0):>6} "
+              f"{histogram.quantile(0.5) * 1000:>8.1f} {histogram.quantile(0.95) * 1000:>8.1f} "
+              f"{histogram.quantile(0.99) * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
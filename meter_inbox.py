@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Meter Inbox - Bounded per-meter detection queue with an explicit overload policy and deadlines
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('latest', 'coalesce', 'reject')
+
+class InboxFull(Exception):
+    def __init__(self, meter_id, retry_after):
+        super().__init__(f"Detection inbox for {meter_id} is full")
+        self.meter_id = meter_id
+        self.retry_after = retry_after
+
+class Ticket:
+    def __init__(self, deadline):
+        """Handle for one submitted request; `deadline` is a time.monotonic() value."""
+        self.deadline = deadline
+        self.status = 'pending'  # pending, done, superseded, expired or error
+        self.result = None
+        self._event = threading.Event()
+
+    def resolve(self, status, result=None):
+        self.status = status
+        self.result = result
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """Block until resolved; returns False on timeout."""
+        return self._event.wait(timeout)
+
+class MeterInbox:
+    def __init__(self, handler, capacity=1, policy='latest', deadline=20.0):
+        """Queue at most `capacity` requests per meter behind the one being processed.
+
+        One worker thread per meter calls handler(payload, deadline). When the
+        queue is full, policy 'latest' drops the oldest queued request,
+        'coalesce' replaces its payload and answers all its callers with one
+        result, and 'reject' raises InboxFull with a Retry-After estimate.
+        Requests still queued `deadline` seconds after submission are dropped.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown inbox policy: {policy}")
+        self.handler = handler
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self.deadline = deadline
+        self._meters = {}  # meter id -> {'pending': deque of [payload, ticket], 'busy': bool}
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._avg_seconds = 1.0  # moving average of handler time, for Retry-After
+
+    def _meter(self, meter_id):
+        state = self._meters.get(meter_id)
+        if state is None:
+            state = self._meters[meter_id] = {'pending': deque(), 'busy': False}
+            threading.Thread(target=self._work, args=(meter_id, state), name=f"inbox-{meter_id}",
+                             daemon=True).start()
+        return state
+
+    def submit(self, meter_id, payload):
+        """Queue a request and return its Ticket (raises InboxFull under the 'reject' policy)."""
+        with self._lock:
+            state = self._meter(meter_id)
+            pending = state['pending']
+            if len(pending) >= self.capacity:
+                if self.policy == 'reject':
+                    metrics.inc('inbox_dropped', meter=meter_id, reason='rejected')
+                    waiting = len(pending) + (1 if state['busy'] else 0)
+                    raise InboxFull(meter_id, max(1, math.ceil(self._avg_seconds * waiting)))
+                if self.policy == 'coalesce':
+                    # Newest payload wins; everyone waiting on the queued request shares its result
+                    pending[-1][0] = payload
+                    metrics.inc('inbox_coalesced', meter=meter_id)
+                    return pending[-1][1]
+                _, dropped = pending.popleft()
+                dropped.resolve('superseded')
+                metrics.inc('inbox_dropped', meter=meter_id, reason='superseded')
+
+            ticket = Ticket(time.monotonic() + self.deadline)
+            pending.append([payload, ticket])
+            metrics.set_gauge('inbox_depth', len(pending), meter=meter_id)
+            self._ready.notify_all()
+            return ticket
+
+    def _work(self, meter_id, state):
+        while True:
+            with self._lock:
+                while not state['pending']:
+                    state['busy'] = False
+                    self._ready.wait()
+                payload, ticket = state['pending'].popleft()
+                state['busy'] = True
+                metrics.set_gauge('inbox_depth', len(state['pending']), meter=meter_id)
+
+            if time.monotonic() > ticket.deadline:
+                metrics.inc('inbox_dropped', meter=meter_id, reason='expired')
+                ticket.resolve('expired')
+                continue
+
+            start = time.perf_counter()
+            try:
+                ticket.resolve('done', self.handler(payload, ticket.deadline))
+            except Exception as e:
+                logger.exception("❌ Detection failed for meter %s: %s", meter_id, e)
+                ticket.resolve('error', str(e))
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._avg_seconds = 0.7 * self._avg_seconds + 0.3 * elapsed
+
+    def depth(self, meter_id):
+        with self._lock:
+            state = self._meters.get(meter_id)
+            return len(state['pending']) if state else 0
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Metrics - Per-stage latency histograms, in-flight gauges and counters in Prometheus format
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a fast SQLite write up to a slow KSEB scrape
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS, reservoir_size=1024):
+        """Cumulative bucket counts plus a window of recent samples for quantiles."""
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=reservoir_size)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Return the q-quantile of the recent samples (0 when empty)."""
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        index = min(len(values) - 1, int(q * len(values)))
+        return values[index]
+
+    def cumulative_counts(self):
+        running = 0
+        for count in self.bucket_counts:
+            running += count
+            yield running
+
+class MetricsRegistry:
+    def __init__(self, prefix='enervise'):
+        """Thread-safe store of stage timings, in-flight gauges and counters."""
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms = {}  # stage -> Histogram
+        self._in_flight = {}   # stage -> int
+        self._errors = {}      # stage -> int
+        self._counters = {}    # (name, labels tuple) -> float
+        self._gauges = {}      # (name, labels tuple) -> float
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def record_error(self, stage):
+        with self._lock:
+            self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a free-form counter, e.g. inc('inference_skipped', meter='default')."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        """Set a free-form gauge, e.g. set_gauge('inference_skip_ratio', 0.8, source='sample.mp4')."""
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def get_counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def _adjust_in_flight(self, stage, delta):
+        with self._lock:
+            self._in_flight[stage] = self._in_flight.get(stage, 0) + delta
+
+    @contextmanager
+    def timer(self, stage):
+        """Time a block; exceptions are counted as stage errors and re-raised."""
+        self._adjust_in_flight(stage, 1)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record_error(stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+            self._adjust_in_flight(stage, -1)
+
+    def timed(self, stage):
+        """Decorator form of timer()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self, stage):
+        """Return count and p50/p95/p99 for a stage (handy for logs and tests)."""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                return {'count': 0, 'errors': self._errors.get(stage, 0)}
+            result = {'count': histogram.count, 'errors': self._errors.get(stage, 0)}
+            for q in QUANTILES:
+                result[f"p{int(q * 100)}"] = histogram.quantile(q)
+            return result
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {p}_stage_duration_seconds Time spent in each processing stage.")
+            lines.append(f"# TYPE {p}_stage_duration_seconds histogram")
+            for stage, h in sorted(self._histograms.items()):
+                for bound, count in zip(h.buckets, h.cumulative_counts()):
+                    lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{p}_stage_duration_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{p}_stage_duration_seconds_count{{stage="{stage}"}} {h.count}')
+
+            lines.append(f"# HELP {p}_stage_latency_seconds Recent p50/p95/p99 latency per stage.")
+            lines.append(f"# TYPE {p}_stage_latency_seconds summary")
+            for stage, h in sorted(self._histograms.items()):
+                for q in QUANTILES:
+                    lines.append(f'{p}_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {h.quantile(q):.6f}')
+                lines.append(f'{p}_stage_latency_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{p}_stage_latency_seconds_count{{stage="{stage}"}} {h.count}')
+
+            lines.append(f"# HELP {p}_stage_in_flight Calls currently inside each stage.")
+            lines.append(f"# TYPE {p}_stage_in_flight gauge")
+            for stage, value in sorted(self._in_flight.items()):
+                lines.append(f'{p}_stage_in_flight{{stage="{stage}"}} {value}')
+
+            lines.append(f"# HELP {p}_stage_errors_total Failed calls per stage.")
+            lines.append(f"# TYPE {p}_stage_errors_total counter")
+            for stage, value in sorted(self._errors.items()):
+                lines.append(f'{p}_stage_errors_total{{stage="{stage}"}} {value}')
+
+            for values, kind, suffix in ((self._counters, 'counter', '_total'), (self._gauges, 'gauge', '')):
+                for name in sorted({name for name, _ in values}):
+                    lines.append(f"# TYPE {p}_{name}{suffix} {kind}")
+                    for (metric_name, labels), value in sorted(values.items()):
+                        if metric_name != name:
+                            continue
+                        label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                        label_suffix = f"{{{label_text}}}" if label_text else ''
+                        lines.append(f"{p}_{name}{suffix}{label_suffix} {value}")
+        return '\n'.join(lines) + '\n'
+
+# Global registry shared by the app, the detectors and the database helpers
+metrics = MetricsRegistry()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Mock Roboflow - Local stand-in for the hosted inference API with configurable latency and errors
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def digit_predictions(reading, confidence=0.9):
+    """Roboflow-style predictions for a row of digits, left to right."""
+    return {'predictions': [
+        {'class': d, 'x': 100 + i * 40, 'y': 100, 'width': 30, 'height': 50, 'confidence': confidence}
+        for i, d in enumerate(reading)
+    ]}
+
+# Readings from the sample video, replayed in order when no recording is given
+DEFAULT_RESPONSES = [digit_predictions(r) for r in
+                     ('1564', '1580', '1602', '1643', '1652', '1690', '1724', '1739', '1745')]
+
+class MockRoboflowServer:
+    def __init__(self, responses=None, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 host='127.0.0.1', port=0):
+        """Answer every POST with the next recorded response, in a loop.
+
+        Each request sleeps `latency` seconds plus up to `jitter` more; a
+        fraction `error_rate` of requests get `error_status` instead.
+        """
+        self.responses = responses or DEFAULT_RESPONSES
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self._cycle = itertools.cycle(self.responses)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _next(self):
+        """Return (status, body) for one request."""
+        with self._lock:
+            self.requests += 1
+            if random.random() < self.error_rate:
+                self.errors += 1
+                return self.error_status, {'message': 'Mock error'}
+            return 200, next(self._cycle)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(mock.latency + random.uniform(0, mock.jitter))
+                status, body = mock._next()
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if status == 429:
+                    self.send_header('Retry-After', '1')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def load_responses(path):
+    """Load recorded prediction JSON: one response object or a list of them."""
+    with open(path) as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Roboflow inference API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=9001, help="Port to listen on")
+    parser.add_argument("--responses", help="JSON file with a recorded response or a list of responses")
+    parser.add_argument("--latency", type=float, default=0.2, help="Base response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Extra random latency in seconds")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error_status", type=int, default=503, help="HTTP status for failed requests")
+    args = parser.parse_args()
+
+    responses = load_responses(args.responses) if args.responses else None
+    server = MockRoboflowServer(responses, args.latency, args.jitter, args.error_rate, args.error_status,
+                                args.host, args.port)
+    print(f"🧪 Mock Roboflow listening on {server.url}")
+    print(f"   Point the app at it with ROBOFLOW_API_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n🛑 Stopped after {server.requests} requests ({server.errors} errors)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Reading Fusion - Per-meter temporal filter that votes digits across frames and rejects implausible readings
+"""
+
+import threading
+from collections import deque
+
+class ReadingFusion:
+    def __init__(self, window=4, decay=0.5, max_rate_per_hour=0.0, slack=1.0, confirm=2):
+        """Fuse each meter's recent detections into one plausible cumulative reading.
+
+        Every digit position is voted over the last `window` detections
+        (right-aligned), weighting each digit by its confidence and by
+        `decay` per step of age. The fused value must not go below the last
+        accepted value and, when `max_rate_per_hour` is set, must not rise
+        faster than that many kWh per hour of timestamp plus `slack`. A value
+        failing either check is only accepted after `confirm` consecutive
+        detections agree on it (meter replaced, first reading was wrong).
+        """
+        self.window = window
+        self.decay = decay
+        self.max_rate_per_hour = max_rate_per_hour
+        self.slack = slack
+        self.confirm = confirm
+        self._meters = {}
+        self._lock = threading.Lock()
+
+    def _meter(self, meter_id):
+        state = self._meters.get(meter_id)
+        if state is None:
+            state = self._meters[meter_id] = {
+                'history': deque(maxlen=self.window),  # [(digit, confidence)] per detection, newest last
+                'value': None,
+                'time': None,
+                'pending': None,  # (value, count) of an implausible value awaiting confirmation
+            }
+        return state
+
+    def vote(self, history):
+        """Return the confidence-weighted digit string for a list of detections (newest last)."""
+        # Most common digit count, newest first on ties, so a stray or missed digit is outvoted
+        lengths = [len(digits) for digits in reversed(history)]
+        width = max(lengths, key=lengths.count)
+        fused = []
+        for position in range(width):
+            scores = {}
+            for age, digits in enumerate(reversed(history)):
+                offset = position + len(digits) - width
+                if offset < 0:
+                    continue  # Shorter detection: missing leading digits cast no vote
+                digit, confidence = digits[offset]
+                scores[digit] = scores.get(digit, 0.0) + confidence * self.decay ** age
+            fused.append(max(scores, key=scores.get) if scores else '0')
+        return ''.join(fused)
+
+    def update(self, meter_id, digits, timestamp):
+        """Add one detection ([(digit, confidence)] left to right).
+
+        Returns (value, status): status is 'accepted', 'unchanged',
+        'confirmed', 'rejected_decrease', 'rejected_rate' or 'rejected_empty';
+        value is the meter's current accepted reading (None until the first one).
+        """
+        digits = [(str(d), float(c)) for d, c in digits if str(d).isdigit()]
+        with self._lock:
+            state = self._meter(meter_id)
+            if not digits:
+                return state['value'], 'rejected_empty'
+            if state['time'] is not None and timestamp < state['time']:
+                # The source went back in time (video looped or was scrubbed): start over
+                state['history'].clear()
+                state.update(value=None, time=None, pending=None)
+
+            state['history'].append(digits)
+            value = float(self.vote(list(state['history'])))
+            last = state['value']
+
+            if last is None:
+                status = 'accepted'
+            elif value == last:
+                state['pending'] = None
+                state['time'] = timestamp
+                return last, 'unchanged'
+            elif value < last:
+                status = 'rejected_decrease'
+            elif self.max_rate_per_hour and state['time'] is not None and \
+                    value - last > self.max_rate_per_hour * (timestamp - state['time']) / 3600 + self.slack:
+                status = 'rejected_rate'
+            else:
+                status = 'accepted'
+
+            if status != 'accepted':
+                pending_value, count = state['pending'] or (None, 0)
+                count = count + 1 if pending_value == value else 1
+                if count < self.confirm:
+                    state['pending'] = (value, count)
+                    return last, status
+                status = 'confirmed'
+                # Forget the votes for the old level so they do not drag the new one back
+                state['history'].clear()
+                state['history'].append(digits)
+
+            state.update(value=value, time=timestamp, pending=None)
+            return value, status
+
+    def state(self, meter_id):
+        """Return a meter's accepted value and time."""
+        with self._lock:
+            state = self._meter(meter_id)
+            return {'value': state['value'], 'time': state['time']}
+
+    def restore(self, meter_id, value, timestamp=None):
+        """Seed a meter with a previously accepted value."""
+        with self._lock:
+            self._meter(meter_id).update(value=value, time=timestamp)
+
+    def reset(self, meter_id=None):
+        with self._lock:
+            if meter_id is None:
+                self._meters.clear()
+            else:
+                self._meters.pop(meter_id, None)
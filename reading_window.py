@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Reading Window - Bounded in-memory history of recent readings for duplicate detection
+"""
+
+import math
+import threading
+from collections import deque
+
+class DeltaRingBuffer:
+    def __init__(self, size=10, tolerance=0.1):
+        """Keep the last `size` deltas, bucketed by `tolerance` for O(1) lookups."""
+        self.size = size
+        self.tolerance = tolerance
+        self._values = deque()
+        self._buckets = {}  # quantized key -> {value: count}
+
+    def _key(self, value):
+        return math.floor(value / self.tolerance)
+
+    def add(self, value):
+        """Append a value, evicting the oldest one when the buffer is full."""
+        value = float(value)
+        if len(self._values) >= self.size:
+            self._discard(self._values.popleft())
+        self._values.append(value)
+        bucket = self._buckets.setdefault(self._key(value), {})
+        bucket[value] = bucket.get(value, 0) + 1
+
+    def _discard(self, value):
+        key = self._key(value)
+        bucket = self._buckets[key]
+        bucket[value] -= 1
+        if bucket[value] == 0:
+            del bucket[value]
+        if not bucket:
+            del self._buckets[key]
+
+    def contains(self, value):
+        """Return True if a value within `tolerance` is already in the buffer."""
+        value = float(value)
+        key = self._key(value)
+        # Anything closer than one bucket width lives in this bucket or a neighbour
+        for k in (key - 1, key, key + 1):
+            for existing in self._buckets.get(k, ()):
+                if abs(value - existing) < self.tolerance:
+                    return True
+        return False
+
+    def values(self):
+        """Return the buffered values, oldest first."""
+        return list(self._values)
+
+    def clear(self):
+        self._values.clear()
+        self._buckets.clear()
+
+    def __len__(self):
+        return len(self._values)
+
+class DuplicateWindow:
+    def __init__(self, size=10, tolerance=0.1):
+        """Per-meter ring buffers of recent reading deltas."""
+        self.size = size
+        self.tolerance = tolerance
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def _buffer(self, meter_id):
+        buffer = self._buffers.get(meter_id)
+        if buffer is None:
+            buffer = self._buffers[meter_id] = DeltaRingBuffer(self.size, self.tolerance)
+        return buffer
+
+    def seed(self, meter_id, values):
+        """Load values (oldest first) into a meter's buffer, e.g. from the database."""
+        with self._lock:
+            buffer = self._buffer(meter_id)
+            buffer.clear()
+            for value in values:
+                buffer.add(value)
+
+    def is_duplicate(self, meter_id, value):
+        with self._lock:
+            return self._buffer(meter_id).contains(value)
+
+    def add(self, meter_id, value):
+        with self._lock:
+            self._buffer(meter_id).add(value)
+
+    def clear(self, meter_id=None):
+        """Empty one meter's buffer, or all of them."""
+        with self._lock:
+            if meter_id is None:
+                self._buffers.clear()
+            else:
+                self._buffers.pop(meter_id, None)
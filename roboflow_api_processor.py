@@ -3,160 +3,129 @@
 Roboflow API Processor - Use the working Roboflow model via API
 """
 
-import requests
-import base64
-import cv2
-import pandas as pd
 import argparse
 import os
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from detector_backends import BACKENDS, build_backend, group_digits_to_reading
+from metrics import metrics
+from rate_limiter import TokenBucket
+from inference_cache import InferenceCache
+from frame_sampler import iter_frames
 
 class RoboflowAPIProcessor:
-    def __init__(self, api_key, project_id, model_version):
-        """Initialize the Roboflow API processor."""
+    def __init__(self, api_key, project_id, model_version, jpeg_quality=95, cache=None,
+                 api_url="https://detect.roboflow.com", backend='roboflow'):
+        """Initialize the API processor (`cache` is an optional InferenceCache).
+
+        `backend` names the detector in detector_backends.BACKENDS; the hosted
+        Roboflow model by default.
+        """
         self.api_key = api_key
         self.project_id = project_id
         self.model_version = model_version
-        self.base_url = f"https://detect.roboflow.com/{project_id}/{model_version}"
+        self.base_url = f"{api_url.rstrip('/')}/{project_id}/{model_version}"
+        self.backend = build_backend(backend, self.base_url, api_key, model_id=self.base_url,
+                                     jpeg_quality=jpeg_quality, use_cache=False, cache=cache)
+        self.cache = cache
         
-        print(f"✅ Initialized Roboflow API processor")
+        print(f"✅ Initialized API processor ({self.backend.name} backend)")
         print(f"   Project ID: {project_id}")
         print(f"   Model Version: {model_version}")
 
-    def encode_image(self, image_path):
-        """Encode image to base64 for API."""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-
-    def detect_with_api(self, image_path, confidence=0.3):
-        """Detect digits using Roboflow API."""
+    def detect_with_api(self, image, confidence=0.3):
+        """Detect digits with the configured backend (image path or ndarray frame)."""
         try:
-            # Encode image
-            image_data = self.encode_image(image_path)
-            
-            # Prepare request
-            params = {
-                "api_key": self.api_key,
-                "confidence": confidence,
-                "overlap": 0.5
-            }
-            
-            # Make request
-            response = requests.post(
-                self.base_url,
-                params=params,
-                data=image_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"❌ API Error: {response.status_code} - {response.text}")
-                return None
-                
+            return self.backend.detect(image, confidence)
         except Exception as e:
-            print(f"❌ Error calling API: {e}")
+            print(f"❌ Error detecting digits: {e}")
             return None
 
-    def extract_ten_frames_equal_gap(self, video_path):
-        """Extract exactly 10 frames with equal time gaps from start to end."""
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video: {video_path}")
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = total_frames / fps
-        
-        print(f"🎬 Video Info:")
-        print(f"   FPS: {fps:.2f}")
-        print(f"   Total frames: {total_frames}")
-        print(f"   Duration: {duration:.2f}s")
-        
-        # Calculate equal time gaps for 10 frames
-        time_gap = duration / 9
-        frame_gap = int(fps * time_gap)
-        
-        print(f"   Time gap between frames: {time_gap:.2f}s")
-        print(f"   Frame gap: {frame_gap}")
-        
-        frames = []
-        
-        for i in range(10):
-            frame_number = i * frame_gap
-            if frame_number >= total_frames:
-                frame_number = total_frames - 1
-            
-            # Seek to the specific frame
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = cap.read()
-            
-            if ret:
-                timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
-                frames.append((frame_number, timestamp_ms, frame.copy()))
-                print(f"   Frame {i+1}: frame #{frame_number}, time {timestamp_ms/1000:.2f}s")
-            else:
-                print(f"   ❌ Failed to read frame {i+1}")
-        
-        cap.release()
-        print(f"📸 Extracted {len(frames)} frames for processing")
-        return frames
+    def run_pipeline(self, frames, confidence=0.3, workers=4, rate=2.0):
+        """Run decode -> encode -> concurrent inference over `frames`.
 
-    def group_digits_to_reading(self, detections):
-        """Group detected digits into a single meter reading."""
-        if not detections or 'predictions' not in detections:
-            return None
-            
-        # Sort detections by x-coordinate (left to right)
-        sorted_detections = sorted(detections['predictions'], key=lambda x: x['x'])
-        
-        # Extract digits
-        digits = []
-        for det in sorted_detections:
-            if det['class'] not in ['.', '-']:
-                digits.append(det['class'])
-        
-        if not digits:
-            return None
-            
-        # Join digits into reading
-        reading = ''.join(digits)
-        
-        # For 4-digit readings
-        if len(reading) < 4:
-            reading = reading.zfill(4)
-        elif len(reading) > 4:
-            reading = reading[:4]
-            
-        return reading
+        A decode thread pulls frames from the iterable, the calling thread
+        encodes them, and up to `workers` requests are in flight at once,
+        paced by a token bucket of `rate` requests per second. Returns
+        [(frame_num, timestamp_ms, detections)] in the original frame order;
+        an error from `frames` (e.g. a failing decoder) is re-raised here.
+        """
+        bucket = TokenBucket(rate)
+        decoded = queue.Queue(maxsize=workers * 2)
+        in_flight = threading.BoundedSemaphore(workers * 2)
+        done = object()
+        decode_error = []
+
+        def decode_stage():
+            try:
+                for item in frames:
+                    decoded.put(item)
+            except Exception as e:
+                # Raised again in the calling thread so a partial run is not taken as complete
+                decode_error.append(e)
+            finally:
+                decoded.put(done)
+
+        def infer(payload):
+            try:
+                bucket.acquire()
+                return self.backend.detect_encoded(payload, confidence)
+            except Exception as e:
+                print(f"❌ Error calling API: {e}")
+                return None
+            finally:
+                in_flight.release()
+
+        threading.Thread(target=decode_stage, daemon=True).start()
+        pending = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                item = decoded.get()
+                if item is done:
+                    break
+                frame_num, timestamp_ms, frame = item
+                # Bound memory: wait while too many encoded frames are queued
+                in_flight.acquire()
+                payload = self.backend.encode(frame)
+                pending.append((frame_num, timestamp_ms, executor.submit(infer, payload)))
 
-    def process_video(self, video_path, output_csv="roboflow_api_results.csv", confidence=0.3):
-        """Process the video using Roboflow API."""
+            results = [(frame_num, timestamp_ms, future.result()) for frame_num, timestamp_ms, future in pending]
+        if decode_error:
+            raise decode_error[0]
+        return results
+
+    def process_video(self, video_path, output_csv="roboflow_api_results.csv", confidence=0.3, workers=4, rate=2.0,
+                      count=None, interval=None, every=None):
+        """Process the video using Roboflow API.
+
+        Frames are sampled by `count`, `interval` (seconds) or `every` (k-th
+        frame); with none given, 10 evenly spaced frames are used.
+        """
+        import pandas as pd  # Deferred: only needed once results are written
         print(f"\n🚀 Starting video processing with Roboflow API...")
         print(f"   Video: {video_path}")
         print(f"   Output: {output_csv}")
         print(f"   Confidence: {confidence}")
         
-        # Extract exactly 10 frames with equal time gaps
-        frames = self.extract_ten_frames_equal_gap(video_path)
+        # Stream sampled frames; the pipeline's bounded queue keeps memory flat
+        if count is None and interval is None and every is None:
+            count = 10
+        frames = iter_frames(video_path, count=count, interval=interval, every=every)
+        
+        # Detect digits using API, several frames at a time
+        hits_before = metrics.get_counter('inference_cache_hits')
+        start = time.perf_counter()
+        processed = self.run_pipeline(frames, confidence, workers, rate)
+        elapsed = time.perf_counter() - start
         
         results = []
         
-        for i, (frame_num, timestamp_ms, frame) in enumerate(frames):
-            print(f"\n📸 Processing frame {i+1}/10 (frame #{frame_num})")
+        for i, (frame_num, timestamp_ms, detections) in enumerate(processed):
+            print(f"\n📸 Processing frame {i+1}/{len(processed)} (frame #{frame_num})")
             print(f"   Timestamp: {timestamp_ms/1000:.2f}s")
             
-            # Save frame temporarily
-            temp_image_path = f"temp_frame_{i+1}.jpg"
-            cv2.imwrite(temp_image_path, frame)
-            
-            # Detect digits using API
-            detections = self.detect_with_api(temp_image_path, confidence)
-            
-            # Clean up temp file
-            os.remove(temp_image_path)
-            
             if detections and 'predictions' in detections:
                 print(f"   Detected {len(detections['predictions'])} objects")
                 
@@ -165,7 +134,7 @@ class RoboflowAPIProcessor:
                     print(f"     {det['class']}: {det['confidence']:.3f}")
                 
                 # Group digits into reading
-                reading = self.group_digits_to_reading(detections)
+                reading = group_digits_to_reading(detections)
                 
                 if reading:
                     print(f"   ✅ Reading: {reading}")
@@ -182,16 +151,15 @@ class RoboflowAPIProcessor:
                     print(f"   ❌ No valid reading detected")
             else:
                 print(f"   ❌ No detections from API")
-            
-            # Add delay to avoid rate limiting
-            time.sleep(0.5)
         
         # Save results
         if results:
             df = pd.DataFrame(results)
             df.to_csv(output_csv, index=False)
             print(f"\n✅ Processing complete!")
-            print(f"   📊 Total frames processed: {len(frames)}")
+            print(f"   📊 Total frames processed: {len(processed)} in {elapsed:.1f}s ({workers} workers, {rate:g} req/s)")
+            if self.cache is not None:
+                print(f"   🗄️  Served from cache: {metrics.get_counter('inference_cache_hits') - hits_before}")
             print(f"   📈 Valid readings found: {len(results)}")
             print(f"   💾 Results saved to: {output_csv}")
             
@@ -199,14 +167,8 @@ class RoboflowAPIProcessor:
             print(f"\n📋 Final Reading Summary:")
             for i, result in enumerate(results):
                 print(f"   Frame {result['frame_number']}: {result['reading']} (at {result['timestamp_s']:.1f}s)")
-                
-            # Compare with expected readings
-            expected_readings = ['1564', '1580', '1602', '1643', '1652', '1690', '1724', '1739', '1745']
-            print(f"\n🎯 Comparison with Expected Readings:")
-            for i, result in enumerate(results):
-                expected = expected_readings[i] if i < len(expected_readings) else "N/A"
-                match = "✅" if result['reading'] == expected else "❌"
-                print(f"   Frame {result['frame_number']}: {result['reading']} vs {expected} {match}")
+
+            print(f"   🎯 Check accuracy against labeled frames with: python evaluate.py <manifest.csv>")
         else:
             print(f"\n❌ No readings found!")
             
@@ -215,11 +177,24 @@ class RoboflowAPIProcessor:
 def main():
     parser = argparse.ArgumentParser(description="Process video using Roboflow API")
     parser.add_argument("--api_key", required=True, help="Roboflow API key")
+    parser.add_argument("--api_url", default=os.getenv("ROBOFLOW_API_URL", "https://detect.roboflow.com"),
+                        help="Inference API base URL (e.g. a local mock_roboflow.py)")
     parser.add_argument("--project_id", required=True, help="Roboflow project ID")
     parser.add_argument("--model_version", required=True, help="Model version")
     parser.add_argument("--video", required=True, help="Path to input video")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=os.getenv("DETECTOR_BACKEND", "roboflow"),
+                        help="Detector backend")
     parser.add_argument("--conf", type=float, default=0.3, help="Confidence threshold")
     parser.add_argument("--output", default="roboflow_api_results.csv", help="Output CSV file")
+    parser.add_argument("--jpeg_quality", type=int, default=95, help="JPEG quality for uploaded frames")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent inference requests")
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum API requests per second")
+    parser.add_argument("--cache", default="inference_cache.db", help="Inference cache file ('' to disable)")
+    parser.add_argument("--cache_max_mb", type=float, default=64, help="Inference cache size limit in MB")
+    sampling = parser.add_mutually_exclusive_group()
+    sampling.add_argument("--frames", type=int, help="Number of evenly spaced frames to sample (default 10)")
+    sampling.add_argument("--interval", type=float, help="Sample one frame every N seconds")
+    sampling.add_argument("--every", type=int, help="Sample every k-th frame")
     
     args = parser.parse_args()
     
@@ -229,10 +204,13 @@ def main():
         return
     
     # Initialize processor
-    processor = RoboflowAPIProcessor(args.api_key, args.project_id, args.model_version)
+    cache = InferenceCache(args.cache, int(args.cache_max_mb * 1024 * 1024)) if args.cache else None
+    processor = RoboflowAPIProcessor(args.api_key, args.project_id, args.model_version, args.jpeg_quality, cache,
+                                     args.api_url, args.backend)
     
     # Process video
-    results = processor.process_video(args.video, args.output, args.conf)
+    results = processor.process_video(args.video, args.output, args.conf, args.workers, args.rate,
+                                      count=args.frames, interval=args.interval, every=args.every)
     
     if not results.empty:
         print(f"\n🎉 Successfully processed video!")
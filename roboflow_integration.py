@@ -3,154 +3,160 @@
 Roboflow Integration for Flask App - Real-time meter reading detection
 """
 
-import requests
-import base64
-import cv2
+import logging
 import os
+import threading
 import time
-import tempfile
 from datetime import datetime
+from metrics import metrics
+from detector_backends import RoboflowBackend, build_backend, digit_confidences, group_digits_to_reading
+from inference_cache import get_default_cache
+from video_decoder import VideoDecoder
+from frame_change import FrameChangeDetector
+from roi import RoiTracker
+
+logger = logging.getLogger(__name__)
 
 class RoboflowMeterDetector:
-    def __init__(self, api_key, project_id, model_version):
-        """Initialize the Roboflow meter detector."""
+    def __init__(self, api_key, project_id, model_version, jpeg_quality=95, change_detector=None, roi_tracker=None,
+                 backend=None, api_url="https://detect.roboflow.com"):
+        """Initialize the Roboflow meter detector (hosted backend unless `backend` is given)."""
         self.api_key = api_key
         self.project_id = project_id
         self.model_version = model_version
-        self.base_url = f"https://detect.roboflow.com/{project_id}/{model_version}"
+        self.base_url = f"{api_url}/{project_id}/{model_version}"
+        self._decoders = {}  # video path -> VideoDecoder, kept open between calls
+        self._decoders_lock = threading.Lock()
+        self.backend = backend or RoboflowBackend(self.base_url, api_key, jpeg_quality, cache=get_default_cache(),
+                                                  model_id=f"{project_id}/{model_version}")
+        # Skips inference when the digit region has not changed since the last call
+        self.change_detector = change_detector or FrameChangeDetector()
+        self._last_results = {}  # video path -> last successful result
+        # Learns where the digits are so only that region is uploaded
+        self.roi_tracker = roi_tracker or RoiTracker()
         
-        print(f"✅ Initialized Roboflow Meter Detector")
-        print(f"   Project ID: {project_id}")
-        print(f"   Model Version: {model_version}")
+        logger.info("✅ Initialized Roboflow Meter Detector (project %s, version %s, backend %s)",
+                    project_id, model_version, self.backend.name)
 
-    def encode_image(self, image_path):
-        """Encode image to base64 for API."""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+    def detect_meter_reading(self, image, confidence=0.1):
+        """Detect meter reading with the configured backend (image path or ndarray frame)."""
+        return self.backend.detect(image, confidence)
 
-    def detect_meter_reading(self, image_path, confidence=0.1):
-        """Detect meter reading using Roboflow API."""
-        try:
-            # Encode image
-            image_data = self.encode_image(image_path)
-            
-            # Prepare request
-            params = {
-                "api_key": self.api_key,
-                "confidence": confidence,
-                "overlap": 0.5
-            }
-            
-            # Make request
-            response = requests.post(
-                self.base_url,
-                params=params,
-                data=image_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"❌ Roboflow API Error: {response.status_code} - {response.text}")
-                return None
-                
-        except Exception as e:
-            print(f"❌ Error calling Roboflow API: {e}")
-            return None
+    def get_decoder(self, video_path):
+        """Return the long-lived decoder for a video, opening it on first use."""
+        with self._decoders_lock:
+            decoder = self._decoders.get(video_path)
+            if decoder is None:
+                decoder = self._decoders[video_path] = VideoDecoder(video_path)
+            return decoder
 
-    def group_digits_to_reading(self, detections):
-        """Group detected digits into a single meter reading."""
-        if not detections or 'predictions' not in detections:
-            return None
-            
-        # Sort detections by x-coordinate (left to right)
-        sorted_detections = sorted(detections['predictions'], key=lambda x: x['x'])
-        
-        # Extract digits
-        digits = []
-        for det in sorted_detections:
-            if det['class'] not in ['.', '-']:
-                digits.append(det['class'])
-        
-        if not digits:
-            return None
-            
-        # Join digits into reading
-        reading = ''.join(digits)
-        
-        # For 4-digit readings
-        if len(reading) < 4:
-            reading = reading.zfill(4)
-        elif len(reading) > 4:
-            reading = reading[:4]
-            
-        return reading
+    def close(self):
+        """Release all open video decoders."""
+        with self._decoders_lock:
+            for decoder in self._decoders.values():
+                decoder.close()
+            self._decoders.clear()
 
     def extract_frame_from_video(self, video_path, timestamp_seconds):
         """Extract a specific frame from video at given timestamp."""
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video: {video_path}")
-        
-        # Set video position to timestamp
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_number = int(timestamp_seconds * fps)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        
-        ret, frame = cap.read()
-        cap.release()
-        
-        if ret:
-            return frame
-        else:
+        try:
+            return self.get_decoder(video_path).read_at(timestamp_seconds)
+        except ValueError:
             raise ValueError(f"Could not extract frame at {timestamp_seconds}s")
 
+    def _record_inference_decision(self, video_path, skipped):
+        """Count inference calls vs. skipped frames and publish the skip ratio."""
+        source = os.path.basename(video_path)
+        metrics.inc('inference_skipped' if skipped else 'inference_calls', source=source)
+        skipped_count = metrics.get_counter('inference_skipped', source=source)
+        total = skipped_count + metrics.get_counter('inference_calls', source=source)
+        metrics.set_gauge('inference_skip_ratio', round(skipped_count / total, 4), source=source)
+
+    @metrics.timed('process_video_frame')
     def process_video_frame(self, video_path, timestamp_seconds, confidence=0.1):
         """Process a single video frame for meter reading detection."""
         try:
             # Extract frame from video
-            frame = self.extract_frame_from_video(video_path, timestamp_seconds)
-            
-            # Save frame temporarily
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-                temp_path = temp_file.name
-                cv2.imwrite(temp_path, frame)
+            with metrics.timer('frame_seek'):
+                frame = self.extract_frame_from_video(video_path, timestamp_seconds)
+        except Exception as e:
+            logger.error("❌ Error processing frame at %ss: %s", timestamp_seconds, e)
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': timestamp_seconds
+            }
+        return self.process_frame(video_path, frame, timestamp_seconds, confidence)
+
+    def process_frame(self, source, frame, timestamp_seconds, confidence=0.1):
+        """Detect the meter reading in a decoded frame; `source` keys the ROI and change state."""
+        try:
+            # Reuse the previous reading if the display has not changed
+            previous = self._last_results.get(source)
+            if previous is not None and self.change_detector.is_unchanged(source, frame):
+                self._record_inference_decision(source, skipped=True)
+                logger.debug("Frame unchanged at %.1fs, reusing reading %s", timestamp_seconds,
+                             previous['reading'], extra={'sample': True})
+                return dict(previous, timestamp=timestamp_seconds, reused=True)
+            self._record_inference_decision(source, skipped=False)
             
-            # Detect meter reading using Roboflow API
-            detections = self.detect_meter_reading(temp_path, confidence)
+            # Crop to the learned digit region (full frame until one is known)
+            roi = self.roi_tracker.region(source, frame.shape)
+            image, transform = self.roi_tracker.crop(frame, roi)
             
-            # Clean up temp file
-            os.unlink(temp_path)
+            # Detect meter reading using Roboflow API (frame is encoded in memory)
+            detections = self.detect_meter_reading(image, confidence)
             
             if detections and 'predictions' in detections:
-                print(f"   Detected {len(detections['predictions'])} objects at {timestamp_seconds:.1f}s")
-                
-                # Show detection details
-                for det in detections['predictions']:
-                    print(f"     {det['class']}: {det['confidence']:.3f}")
+                detections['predictions'] = self.roi_tracker.to_frame_coords(detections['predictions'], transform)
+
+                # Show detection details (sampled, and only built when debug is on)
+                if logger.isEnabledFor(logging.DEBUG):
+                    details = [(det['class'], round(det['confidence'], 3)) for det in detections['predictions']]
+                    logger.debug("Detected %d objects at %.1fs: %s", len(details), timestamp_seconds, details,
+                                 extra={'sample': True})
                 
                 # Group digits into reading
-                reading = self.group_digits_to_reading(detections)
+                reading = group_digits_to_reading(detections)
                 
                 if reading:
-                    print(f"   ✅ Meter Reading: {reading}")
-                    return {
+                    logger.debug("✅ Meter Reading: %s", reading, extra={'sample': True})
+                    result = {
                         'success': True,
                         'reading': reading,
                         'timestamp': timestamp_seconds,
                         'num_detections': len(detections['predictions']),
-                        'avg_confidence': sum(d['confidence'] for d in detections['predictions']) / len(detections['predictions'])
+                        'avg_confidence': sum(d['confidence'] for d in detections['predictions']) / len(detections['predictions']),
+                        'digits': digit_confidences(detections)
                     }
+                    if detections.get('confidence_known', True):
+                        self.roi_tracker.update(source, detections['predictions'], result['avg_confidence'])
+                    else:
+                        # Text-only backends (Gemini) have no scores or real boxes: equal digit votes,
+                        # no confidence for the scheduler and no learned region
+                        result['avg_confidence'] = None
+                        result['digits'] = [(digit, 1.0) for digit, _ in result['digits']]
+                        self.roi_tracker.reset(source)
+                    self._last_results[source] = result
+                    # Digit region just learned (None = whole frame), for change detection and archiving
+                    result['roi'] = self.roi_tracker.region(source, frame.shape)
+                    if result['roi'] is not None:
+                        self.change_detector.remember(source, frame, result['roi'])
+                    else:
+                        # A changed digit is too small to show on a whole-frame thumbnail; always infer
+                        self.change_detector.forget(source)
+                    return result
                 else:
-                    print(f"   ❌ No valid reading detected")
+                    self.roi_tracker.reset(source)
+                    logger.info("❌ No valid reading detected at %.1fs", timestamp_seconds)
                     return {
                         'success': False,
                         'error': 'No valid reading detected',
                         'timestamp': timestamp_seconds
                     }
             else:
-                print(f"   ❌ No detections from Roboflow API")
+                self.roi_tracker.reset(source)
+                logger.info("❌ No detections from Roboflow API at %.1fs", timestamp_seconds)
                 return {
                     'success': False,
                     'error': 'No detections from API',
@@ -158,7 +164,7 @@ class RoboflowMeterDetector:
                 }
                 
         except Exception as e:
-            print(f"❌ Error processing frame at {timestamp_seconds}s: {e}")
+            logger.error("❌ Error processing frame at %ss: %s", timestamp_seconds, e)
             return {
                 'success': False,
                 'error': str(e),
@@ -167,14 +173,29 @@ class RoboflowMeterDetector:
 
 # Global instance
 roboflow_detector = None
+_detector_lock = threading.Lock()
 
 def initialize_roboflow_detector():
     """Initialize the global Roboflow detector instance."""
     global roboflow_detector
-    if roboflow_detector is None:
+    if roboflow_detector is not None:
+        return roboflow_detector
+    with _detector_lock:
+        # Request threads can race here; only the first one builds the detector
+        if roboflow_detector is not None:
+            return roboflow_detector
+        # ROBOFLOW_API_URL can point at mock_roboflow.py for local testing
+        api_key = os.getenv('ROBOFLOW_API_KEY', "mwY8QAFFdfiIyLG57bQK")
+        project_id = os.getenv('ROBOFLOW_PROJECT_ID', "7-segments-custom-hblhp")
+        model_version = os.getenv('ROBOFLOW_MODEL_VERSION', "6")
+        api_url = os.getenv('ROBOFLOW_API_URL', "https://detect.roboflow.com").rstrip('/')
+        base_url = f"{api_url}/{project_id}/{model_version}"
         roboflow_detector = RoboflowMeterDetector(
-            api_key="mwY8QAFFdfiIyLG57bQK",
-            project_id="7-segments-custom-hblhp", 
-            model_version="6"
+            api_key=api_key,
+            project_id=project_id, 
+            model_version=model_version,
+            api_url=api_url,
+            # Cached results are keyed by the full endpoint, so a mock server's never answer for the real one
+            backend=build_backend(os.getenv('DETECTOR_BACKEND', 'roboflow'), base_url, api_key, model_id=base_url)
         )
     return roboflow_detector
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+ROI Tracker - Learn the digit region from recent detections and crop/downscale frames before upload
+"""
+
+import threading
+from collections import deque
+
+class RoiTracker:
+    def __init__(self, margin=0.3, max_width=640, min_confidence=0.5, history=5):
+        """Track a per-source region of interest from recent bounding boxes.
+
+        The region is the union of the last `history` confident detections,
+        padded by `margin` (fraction of the region size). Crops wider than
+        `max_width` pixels are downscaled. A detection below `min_confidence`
+        clears the region so the next frame is sent in full.
+        """
+        self.margin = margin
+        self.max_width = max_width
+        self.min_confidence = min_confidence
+        self._boxes = {}  # source -> deque of (x1, y1, x2, y2) in full-frame pixels
+        self.history = history
+        self._lock = threading.Lock()
+
+    def region(self, source, frame_shape):
+        """Return the padded ROI (x, y, w, h) for a source, or None for the full frame."""
+        with self._lock:
+            boxes = list(self._boxes.get(source, ()))
+        if not boxes:
+            return None
+
+        frame_h, frame_w = frame_shape[:2]
+        x1 = min(b[0] for b in boxes)
+        y1 = min(b[1] for b in boxes)
+        x2 = max(b[2] for b in boxes)
+        y2 = max(b[3] for b in boxes)
+        pad_x = (x2 - x1) * self.margin
+        pad_y = (y2 - y1) * self.margin
+        x1 = max(0, int(x1 - pad_x))
+        y1 = max(0, int(y1 - pad_y))
+        x2 = min(frame_w, int(x2 + pad_x + 1))
+        y2 = min(frame_h, int(y2 + pad_y + 1))
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return x1, y1, x2 - x1, y2 - y1
+
+    def crop(self, frame, roi):
+        """Crop a frame to `roi` (from region()) and downscale it for upload.
+
+        Returns (image, transform) where transform = (x0, y0, scale) maps
+        coordinates in `image` back to the full frame.
+        """
+        if roi is None:
+            return frame, (0, 0, 1.0)
+
+        import cv2  # Deferred so importing this module does not load OpenCV
+        x, y, w, h = roi
+        image = frame[y:y + h, x:x + w]
+        scale = 1.0
+        if w > self.max_width:
+            scale = self.max_width / w
+            image = cv2.resize(image, (self.max_width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        return image, (x, y, scale)
+
+    def to_frame_coords(self, predictions, transform):
+        """Map predictions from the uploaded image back to full-frame pixels."""
+        x0, y0, scale = transform
+        if (x0, y0, scale) == (0, 0, 1.0):
+            return predictions
+        mapped = []
+        for det in predictions:
+            det = dict(det)
+            det['x'] = x0 + det['x'] / scale
+            det['y'] = y0 + det['y'] / scale
+            det['width'] = det['width'] / scale
+            det['height'] = det['height'] / scale
+            mapped.append(det)
+        return mapped
+
+    def update(self, source, predictions, avg_confidence):
+        """Learn from a detection (full-frame coords); low confidence falls back to the full frame."""
+        if not predictions or avg_confidence < self.min_confidence:
+            self.reset(source)
+            return
+        box = (
+            min(d['x'] - d['width'] / 2 for d in predictions),
+            min(d['y'] - d['height'] / 2 for d in predictions),
+            max(d['x'] + d['width'] / 2 for d in predictions),
+            max(d['y'] + d['height'] / 2 for d in predictions),
+        )
+        with self._lock:
+            boxes = self._boxes.get(source)
+            if boxes is None:
+                boxes = self._boxes[source] = deque(maxlen=self.history)
+            boxes.append(box)
+
+    def reset(self, source=None):
+        with self._lock:
+            if source is None:
+                self._boxes.clear()
+            else:
+                self._boxes.pop(source, None)
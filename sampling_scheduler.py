@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Sampling Scheduler - Adapt how often each meter is sampled to how fast its reading changes
+"""
+
+import threading
+
+from metrics import metrics
+from rate_limiter import TokenBucket
+
+class AdaptiveScheduler:
+    def __init__(self, min_interval=4.5, max_interval=60.0, backoff=2.0, low_confidence=0.5,
+                 budget_per_hour=0):
+        """Per-meter sampling intervals with exponential back-off while readings are stable.
+
+        The interval starts at `min_interval`, is multiplied by `backoff` after
+        every unchanged, confident reading (up to `max_interval`) and drops
+        back to `min_interval` when the digits change, confidence is below
+        `low_confidence` or detection fails. `budget_per_hour` caps inference
+        calls across all meters (0 means unlimited).
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.low_confidence = low_confidence
+        self.budget = TokenBucket(budget_per_hour / 3600.0, capacity=max(1.0, budget_per_hour / 60.0)) \
+            if budget_per_hour else None
+        self._meters = {}  # meter id -> {'interval', 'next_due', 'last_time', 'last_reading'}
+        self._lock = threading.Lock()
+
+    def _meter(self, meter_id):
+        state = self._meters.get(meter_id)
+        if state is None:
+            state = self._meters[meter_id] = {
+                'interval': self.min_interval,
+                'next_due': None,
+                'last_time': None,
+                'last_reading': None
+            }
+        return state
+
+    def should_sample(self, meter_id, now):
+        """Return True if `meter_id` is due at time `now` and the budget allows a call."""
+        with self._lock:
+            state = self._meter(meter_id)
+            if state['last_time'] is not None and now < state['last_time']:
+                # The source jumped backwards (video restarted or was scrubbed)
+                state.update(interval=self.min_interval, next_due=None, last_time=None)
+            if state['next_due'] is not None and now < state['next_due']:
+                return False
+        if self.budget is not None and not self.budget.try_acquire():
+            metrics.inc('sampling_budget_denied', meter=meter_id)
+            return False
+        with self._lock:
+            # Hold the slot until the result is recorded, so concurrent polls do not double-sample
+            state['next_due'] = now + self.min_interval
+            state['last_time'] = now
+        return True
+
+    def record(self, meter_id, now, reading, confidence=None):
+        """Feed back a detection result and schedule the next sample."""
+        with self._lock:
+            state = self._meter(meter_id)
+            changed = reading != state['last_reading']
+            unsure = confidence is not None and confidence < self.low_confidence
+            if changed or unsure:
+                state['interval'] = self.min_interval
+            else:
+                state['interval'] = min(self.max_interval, state['interval'] * self.backoff)
+            state['last_reading'] = reading
+            state['last_time'] = now
+            state['next_due'] = now + state['interval']
+            interval = state['interval']
+        metrics.set_gauge('sampling_interval_seconds', interval, meter=meter_id)
+
+    def record_failure(self, meter_id, now):
+        """A failed detection gets the tightest interval."""
+        with self._lock:
+            state = self._meter(meter_id)
+            state['interval'] = self.min_interval
+            state['last_time'] = now
+            state['next_due'] = now + self.min_interval
+        metrics.set_gauge('sampling_interval_seconds', self.min_interval, meter=meter_id)
+
+    def state(self, meter_id):
+        """Return a copy of a meter's schedule (interval, next_due, last_time, last_reading)."""
+        with self._lock:
+            return dict(self._meter(meter_id))
+
+    def restore(self, meter_id, **state):
+        """Load previously saved schedule fields for a meter."""
+        with self._lock:
+            self._meter(meter_id).update(state)
+
+    def reset(self, meter_id=None):
+        with self._lock:
+            if meter_id is None:
+                self._meters.clear()
+            else:
+                self._meters.pop(meter_id, None)
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Stream Ingestion - Capture threads for files, V4L2 devices and RTSP URLs feeding a shared detection queue
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+from metrics import metrics
+from frame_ring import FrameRing, DEFAULT_SLOT_BYTES
+
+logger = logging.getLogger(__name__)
+
+def parse_sources(spec):
+    """Parse 'meter1=rtsp://cam/stream,meter2=0,meter3=static/sample.mp4' into {stream id: source}."""
+    sources = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        stream_id, sep, source = part.partition('=')
+        if not sep or not stream_id.strip() or not source.strip():
+            raise ValueError(f"Expected id=source, got: {part}")
+        sources[stream_id.strip()] = source.strip()
+    return sources
+
+def is_live_source(source):
+    """Devices and network streams are live; anything else is treated as a file."""
+    return source.isdigit() or source.startswith('/dev/video') or '://' in source
+
+class LatestFrameBuffer:
+    def __init__(self, on_drop=None):
+        """Hold only the newest frame; a frame overwritten before it is taken counts as dropped.
+
+        on_drop(item) is called with each (timestamp, frame) dropped that way.
+        """
+        self._lock = threading.Lock()
+        self._item = None  # (timestamp, frame)
+        self._fresh = False
+        self.dropped = 0
+        self.on_drop = on_drop
+
+    def put(self, timestamp, frame):
+        """Store a frame; returns True if it replaced one that was never taken."""
+        with self._lock:
+            stale = self._fresh
+            previous = self._item
+            if stale:
+                self.dropped += 1
+            self._item = (timestamp, frame)
+            self._fresh = True
+        if stale and self.on_drop is not None:
+            self.on_drop(previous)
+        return stale
+
+    def take(self):
+        """Return (timestamp, frame) if a frame arrived since the last take, else None."""
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._item
+
+class CaptureStream:
+    def __init__(self, stream_id, source, loop=True, reconnect_delay=2.0):
+        """Read `source` on its own thread into a LatestFrameBuffer.
+
+        Files are paced at their native frame rate (and looped when `loop`)
+        so they behave like a camera; timestamps are the video position.
+        Live sources use seconds since the stream started and reconnect
+        after `reconnect_delay` when the capture fails.
+        """
+        self.stream_id = stream_id
+        self.source = source
+        self.live = is_live_source(source)
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.buffer = LatestFrameBuffer()
+        self.frames = 0
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _open(self):
+        import cv2  # Deferred so importing this module does not load OpenCV
+        cap = cv2.VideoCapture(int(self.source) if self.source.isdigit() else self.source)
+        if self.live:
+            # Keep the driver queue short so reads return the newest frame
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _run(self):
+        import cv2
+        started = time.monotonic()
+        while not self._stop.is_set():
+            cap = self._open()
+            if not cap.isOpened():
+                cap.release()
+                self._set_connected(False)
+                logger.warning("⚠️ Could not open stream %s (%s); retrying in %ss",
+                               self.stream_id, self.source, self.reconnect_delay)
+                self._stop.wait(self.reconnect_delay)
+                continue
+
+            self._set_connected(True)
+            frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0)
+            next_frame = time.monotonic()
+            read_since_rewind = 0
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    if not self.live and self.loop and read_since_rewind:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        read_since_rewind = 0
+                        continue
+                    break
+                read_since_rewind += 1
+                if self.live:
+                    timestamp = time.monotonic() - started
+                else:
+                    timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                    # Play files in real time instead of decoding as fast as possible
+                    next_frame += frame_interval
+                    self._stop.wait(max(0.0, next_frame - time.monotonic()))
+                if self.buffer.put(timestamp, frame):
+                    metrics.inc('stream_frames_dropped', stream=self.stream_id)
+                self.frames += 1
+                metrics.inc('stream_frames_captured', stream=self.stream_id)
+
+            cap.release()
+            self._set_connected(False)
+            if not self.live and not self.loop:
+                logger.info("🎬 Stream %s reached the end of %s", self.stream_id, self.source)
+                return
+            if not self._stop.is_set():
+                logger.warning("⚠️ Stream %s dropped; reconnecting in %ss", self.stream_id, self.reconnect_delay)
+                self._stop.wait(self.reconnect_delay)
+
+    def _set_connected(self, connected):
+        self.connected = connected
+        metrics.set_gauge('stream_up', 1 if connected else 0, stream=self.stream_id)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.stream_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def release(self, frame):
+        """Hand back a frame taken from the buffer once it is no longer needed."""
+
+class _RingWriter:
+    def __init__(self, ring, events):
+        """Stands in for LatestFrameBuffer in a decoder process: frames go to shared memory, descriptors to the parent."""
+        self.ring = ring
+        self.events = events
+
+    def put(self, timestamp, frame):
+        slot = self.ring.acquire()
+        if slot is None:
+            # Every slot is still queued or being detected on; this frame is dropped
+            self.events.put(('dropped', timestamp, None))
+            return False
+        try:
+            descriptor = self.ring.write(slot, frame)
+        except ValueError as e:
+            self.ring.release(slot)
+            logger.error("❌ %s", e)
+            self.events.put(('dropped', timestamp, None))
+            return False
+        self.events.put(('frame', timestamp, descriptor))
+        return False
+
+class _RingCapture(CaptureStream):
+    def __init__(self, stream_id, source, loop, reconnect_delay, ring, events, stop):
+        super().__init__(stream_id, source, loop, reconnect_delay)
+        self.buffer = _RingWriter(ring, events)
+        self.events = events
+        self._stop = stop
+
+    def _set_connected(self, connected):
+        self.connected = connected
+        self.events.put(('connected', connected, None))
+
+def _decode_process(stream_id, source, loop, reconnect_delay, ring, events, stop):
+    """Decoder process body: capture `source` into `ring` until `stop` is set."""
+    try:
+        _RingCapture(stream_id, source, loop, reconnect_delay, ring, events, stop)._run()
+    finally:
+        events.put(('exit', None, None))
+        ring.close()
+
+class ProcessCaptureStream(CaptureStream):
+    def __init__(self, stream_id, source, loop=True, reconnect_delay=2.0, slots=4, slot_bytes=DEFAULT_SLOT_BYTES):
+        """CaptureStream whose decoding runs in a separate process.
+
+        The decoder process writes frames into a FrameRing of `slots` shared
+        memory buffers and sends only descriptors back; the buffer holds
+        zero-copy views, which go back to the ring through release(). Frames
+        arriving while every slot is in use are dropped, as a camera would.
+        """
+        super().__init__(stream_id, source, loop, reconnect_delay)
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.buffer = LatestFrameBuffer(on_drop=lambda item: self.release(item[1]))
+        self.ring = None
+        self._handed_out = {}  # id(view) -> slot for frames not yet released
+        self._slots_lock = threading.Lock()
+        self._process = None
+
+    def _receive(self):
+        while True:
+            kind, value, descriptor = self._events.get()
+            if kind == 'exit':
+                self._set_connected(False)
+                return
+            if kind == 'connected':
+                self._set_connected(value)
+            elif kind == 'dropped':
+                self.buffer.dropped += 1
+                metrics.inc('stream_frames_dropped', stream=self.stream_id)
+            else:
+                frame = self.ring.view(descriptor)
+                with self._slots_lock:
+                    self._handed_out[id(frame)] = descriptor[0]
+                if self.buffer.put(value, frame):
+                    metrics.inc('stream_frames_dropped', stream=self.stream_id)
+                self.frames += 1
+                metrics.inc('stream_frames_captured', stream=self.stream_id)
+
+    def release(self, frame):
+        with self._slots_lock:
+            slot = self._handed_out.pop(id(frame), None)
+        if slot is not None:
+            self.ring.release(slot)
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        self.ring = FrameRing(self.slots, self.slot_bytes, context)
+        self._events = context.Queue()
+        self._stop = context.Event()
+        self._process = context.Process(
+            target=_decode_process,
+            args=(self.stream_id, self.source, self.loop, self.reconnect_delay, self.ring, self._events, self._stop),
+            name=f"decode-{self.stream_id}", daemon=True)
+        self._process.start()
+        self._thread = threading.Thread(target=self._receive, name=f"receive-{self.stream_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        if self._process is None:
+            return
+        self._stop.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._events.put(('exit', None, None))
+        self._thread.join(timeout)
+        self._process = None
+        item = self.buffer.take()
+        if item is not None:
+            self.release(item[1])
+        self.ring.close()
+
+class StreamManager:
+    def __init__(self, process_fn, scheduler=None, workers=2, queue_size=None, poll_interval=0.05, processes=False):
+        """Fan frames from many capture streams into a bounded detection queue.
+
+        A dispatcher takes each stream's newest frame when `scheduler`
+        (AdaptiveScheduler, optional) says the stream is due and no detection
+        for it is already queued or running; `workers` threads call
+        process_fn(stream_id, timestamp, frame). With `processes`, each
+        stream decodes in its own process and frames arrive through shared
+        memory (ProcessCaptureStream).
+        """
+        self.process_fn = process_fn
+        self.processes = processes
+        self.scheduler = scheduler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.streams = {}
+        self._queue = queue.Queue(maxsize=queue_size or workers * 2)
+        self._busy = set()  # stream ids with a detection queued or running
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def add_stream(self, stream_id, source, **kwargs):
+        stream_class = ProcessCaptureStream if self.processes else CaptureStream
+        stream = stream_class(stream_id, source, **kwargs)
+        with self._lock:
+            if stream_id in self.streams:
+                raise ValueError(f"Stream already exists: {stream_id}")
+            self.streams[stream_id] = stream
+        if self._threads:
+            stream.start()
+        return stream
+
+    def remove_stream(self, stream_id):
+        with self._lock:
+            stream = self.streams.pop(stream_id, None)
+        if stream is not None:
+            stream.stop()
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            with self._lock:
+                streams = [s for s in self.streams.values() if s.stream_id not in self._busy]
+            for stream in streams:
+                item = stream.buffer.take()
+                if item is None:
+                    continue
+                timestamp, frame = item
+                if self.scheduler is not None and not self.scheduler.should_sample(stream.stream_id, timestamp):
+                    stream.release(frame)
+                    continue
+                try:
+                    self._queue.put_nowait((stream.stream_id, timestamp, frame))
+                except queue.Full:
+                    metrics.inc('detection_queue_full', stream=stream.stream_id)
+                    stream.release(frame)
+                    continue
+                with self._lock:
+                    self._busy.add(stream.stream_id)
+            metrics.set_gauge('detection_queue_depth', self._queue.qsize())
+            self._stop.wait(self.poll_interval)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            stream_id, timestamp, frame = item
+            try:
+                self.process_fn(stream_id, timestamp, frame)
+            except Exception as e:
+                logger.exception("❌ Detection failed for stream %s: %s", stream_id, e)
+            finally:
+                with self._lock:
+                    self._busy.discard(stream_id)
+                    stream = self.streams.get(stream_id)
+                if stream is not None:
+                    stream.release(frame)
+
+    def start(self):
+        with self._lock:
+            streams = list(self.streams.values())
+        for stream in streams:
+            stream.start()
+        self._threads = [threading.Thread(target=self._work, name=f"detect-{i}", daemon=True)
+                         for i in range(self.workers)]
+        self._threads.append(threading.Thread(target=self._dispatch, name="dispatch", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info("📡 Started %d stream(s) with %d detection worker(s)", len(streams), self.workers)
+        return self
+
+    def stop(self):
+        # Workers finish before streams close, so no frame view outlives its shared memory
+        self._stop.set()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(5.0)
+        self._threads = []
+        with self._lock:
+            streams = list(self.streams.values())
+        for stream in streams:
+            stream.stop()
+
+    def status(self):
+        """Per-stream connection state, captured and dropped frame counts."""
+        with self._lock:
+            return {sid: {'source': s.source, 'connected': s.connected, 'frames': s.frames,
+                          'dropped': s.buffer.dropped}
+                    for sid, s in self.streams.items()}
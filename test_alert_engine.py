@@ -0,0 +1,49 @@
+import sqlite3
+from datetime import datetime
+from alert_engine import AlertEngine, init_alerts_schema
+
+def make_engine(db_path):
+    conn = sqlite3.connect(db_path)
+    init_alerts_schema(conn.cursor())
+    conn.commit()
+    conn.close()
+    return AlertEngine(db_path=str(db_path))
+
+def count_alerts(db_path):
+    conn = sqlite3.connect(db_path)
+    count = conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+    conn.close()
+    return count
+
+def test_alert_fires_only_on_transition(tmp_path):
+    db_path = tmp_path / "alerts.db"
+    engine = make_engine(db_path)
+    now = datetime(2025, 3, 30, 12, 0)
+
+    # ok -> warning fires once, repeated evaluations stay quiet
+    for _ in range(5):
+        engine.evaluate("admin", {'current_bill': 95, 'cost_limit': 100, 'now': now})
+    assert count_alerts(db_path) == 1
+
+    # warning -> danger fires again
+    fired = engine.evaluate("admin", {'current_bill': 120, 'cost_limit': 100, 'now': now})
+    assert [a['type'] for a in fired] == ['danger']
+    assert count_alerts(db_path) == 2
+
+def test_dedup_key_suppresses_repeats(tmp_path):
+    db_path = tmp_path / "alerts.db"
+    engine = make_engine(db_path)
+    now = datetime(2025, 3, 30, 12, 0)
+
+    engine.evaluate("admin", {'current_bill': 95, 'cost_limit': 100, 'now': now})
+    # A restarted engine has no state, but the index still blocks the repeat
+    engine = AlertEngine(db_path=str(db_path))
+    fired = engine.evaluate("admin", {'current_bill': 96, 'cost_limit': 100, 'now': now})
+    assert fired == []
+    assert count_alerts(db_path) == 1
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_alert_fires_only_on_transition(pathlib.Path(tempfile.mkdtemp()))
+    test_dedup_key_suppresses_repeats(pathlib.Path(tempfile.mkdtemp()))
+    print("Alert engine tests passed")
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import roboflow_integration
+from detector_backends import DetectorBackend
+from inference_cache import InferenceCache
+from rate_limiter import TokenBucket
+from roboflow_api_processor import RoboflowAPIProcessor
+
+class SlowBackend(DetectorBackend):
+    """Answers with the frame number after a delay that shrinks with it, so later frames finish first."""
+    name = 'slow'
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.lock = threading.Lock()
+        self.encoded = 0
+        self.finished = 0
+        self.active = 0
+        self.max_active = 0
+        self.max_queued = 0
+
+    def encode(self, image):
+        with self.lock:
+            self.encoded += 1
+            self.max_queued = max(self.max_queued, self.encoded - self.finished)
+        return image
+
+    def infer(self, payload, confidence=0.1):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.02 * (10 - payload % 10))
+            if payload in self.fail_on:
+                raise RuntimeError(f"frame {payload} failed")
+            return {'predictions': [], 'frame': payload}
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.finished += 1
+
+def make_processor(backend):
+    processor = RoboflowAPIProcessor("key", "project", "1", backend='local')
+    processor.backend = backend
+    return processor
+
+def test_pipeline_keeps_frame_order_and_bounds_in_flight():
+    backend = SlowBackend()
+    frames = [(n, n * 100.0, n) for n in range(20)]
+
+    results = make_processor(backend).run_pipeline(frames, workers=2, rate=1000)
+
+    assert [(n, ts) for n, ts, _ in results] == [(n, n * 100.0) for n in range(20)]
+    assert [detections['frame'] for _, _, detections in results] == list(range(20))
+    assert backend.max_active <= 2
+    # Encoded frames wait on the in-flight bound of workers * 2
+    assert backend.max_queued <= 4
+
+def test_pipeline_turns_worker_errors_into_none():
+    backend = SlowBackend(fail_on={1, 3})
+    frames = [(n, 0.0, n) for n in range(5)]
+
+    results = make_processor(backend).run_pipeline(frames, workers=3, rate=1000)
+
+    assert [detections is None for _, _, detections in results] == [False, True, False, True, False]
+
+def test_pipeline_raises_decode_errors():
+    def frames():
+        yield (0, 0.0, 0)
+        yield (1, 100.0, 1)
+        raise IOError("decoder failed")
+
+    try:
+        make_processor(SlowBackend()).run_pipeline(frames(), workers=2, rate=1000)
+        assert False, "expected IOError"
+    except IOError as e:
+        assert "decoder failed" in str(e)
+
+def test_token_bucket_holds_rate():
+    bucket = TokenBucket(20, capacity=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    # One token up front, then one every 1/20 s
+    assert 0.45 <= elapsed < 1.0
+    assert not bucket.try_acquire()
+
+def test_cache_keys_depend_on_endpoint(tmp_path, monkeypatch):
+    cache = InferenceCache(str(tmp_path / "cache.db"))
+    hosted = RoboflowAPIProcessor("key", "project", "1", cache=cache)
+    mock = RoboflowAPIProcessor("key", "project", "1", cache=cache, api_url="http://127.0.0.1:9001")
+    assert (cache.make_key(b"frame", hosted.backend.model_id, 0.3, 0.5)
+            != cache.make_key(b"frame", mock.backend.model_id, 0.3, 0.5))
+
+    monkeypatch.setattr(roboflow_integration, 'roboflow_detector', None)
+    monkeypatch.setenv('ROBOFLOW_API_URL', "http://127.0.0.1:9001")
+    monkeypatch.setenv('INFERENCE_CACHE_PATH', "")
+    detector = roboflow_integration.initialize_roboflow_detector()
+    assert detector.backend.model_id.startswith("http://127.0.0.1:9001/")
+
+if __name__ == "__main__":
+    test_pipeline_keeps_frame_order_and_bounds_in_flight()
+    test_pipeline_turns_worker_errors_into_none()
+    test_pipeline_raises_decode_errors()
+    test_token_bucket_holds_rate()
+    print("API pipeline tests passed")
@@ -0,0 +1,131 @@
+import numpy as np
+from detector_backends import (SevenSegmentBackend, CascadeBackend, DetectorBackend, GeminiBackend, build_backend,
+                               extract_kwh_values, group_digits_to_reading)
+from inference_cache import InferenceCache
+
+# Lit segments (a, b, c, d, e, f, g) for each digit
+SEGMENTS = {
+    '0': 'abcdef', '1': 'bc', '2': 'abdeg', '3': 'abcdg', '4': 'bcfg',
+    '5': 'acdfg', '6': 'acdefg', '7': 'abc', '8': 'abcdefg', '9': 'abcdfg',
+}
+
+def draw_reading(text, digit_w=40, digit_h=80, t=8, gap=20):
+    """Render bright 7-segment digits on a dark background."""
+    image = np.full((digit_h + 40, len(text) * (digit_w + gap) + gap, 3), 30, dtype=np.uint8)
+    for i, ch in enumerate(text):
+        x, y = gap + i * (digit_w + gap), 20
+        half = digit_h // 2
+        bars = {
+            'a': (x + t, y, x + digit_w - t, y + t),
+            'b': (x + digit_w - t, y + t, x + digit_w, y + half),
+            'c': (x + digit_w - t, y + half, x + digit_w, y + digit_h - t),
+            'd': (x + t, y + digit_h - t, x + digit_w - t, y + digit_h),
+            'e': (x, y + half, x + t, y + digit_h - t),
+            'f': (x, y + t, x + t, y + half),
+            'g': (x + t, y + half - t // 2, x + digit_w - t, y + half + t // 2),
+        }
+        for segment in SEGMENTS[ch]:
+            x1, y1, x2, y2 = bars[segment]
+            image[y1:y2, x1:x2] = 230
+    return image
+
+def read(backend, image):
+    predictions = sorted(backend.detect(image)['predictions'], key=lambda p: p['x'])
+    return ''.join(p['class'] for p in predictions)
+
+def test_local_backend_reads_all_digits():
+    backend = SevenSegmentBackend()
+    assert read(backend, draw_reading("1564")) == "1564"
+    assert read(backend, draw_reading("0239")) == "0239"
+    assert read(backend, draw_reading("78")) == "78"
+
+def test_local_backend_reads_image_files(tmp_path):
+    import cv2
+    path = str(tmp_path / "meter.png")
+    cv2.imwrite(path, draw_reading("1564"))
+    backend = SevenSegmentBackend()
+    assert read(backend, path) == "1564"
+    with open(path, 'rb') as image_file:
+        assert read(backend, image_file.read()) == "1564"
+    try:
+        backend.detect(str(tmp_path / "missing.png"))
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+class FixedBackend(DetectorBackend):
+    def __init__(self, name, confidence):
+        self.name = name
+        self.confidence = confidence
+        self.calls = 0
+
+    def detect(self, image, confidence=0.1):
+        self.calls += 1
+        return {'predictions': [{'class': '1', 'x': 0, 'y': 0, 'width': 1, 'height': 1,
+                                 'confidence': self.confidence}]}
+
+def test_cascade_uses_hosted_only_when_unsure():
+    hosted = FixedBackend('roboflow', 0.9)
+    cascade = CascadeBackend(FixedBackend('local', 0.95), hosted, min_confidence=0.6)
+    cascade.detect(None)
+    assert hosted.calls == 0
+
+    cascade = CascadeBackend(FixedBackend('local', 0.3), hosted, min_confidence=0.6)
+    cascade.detect(None)
+    assert hosted.calls == 1
+
+class EchoBackend(DetectorBackend):
+    name = 'echo'
+    max_concurrency = 3
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.calls = 0
+
+    def infer(self, payload, confidence=0.1):
+        self.calls += 1
+        return {'predictions': [{'class': ch, 'x': i, 'y': 0, 'width': 1, 'height': 1, 'confidence': 0.9}
+                                for i, ch in enumerate(payload.decode())]}
+
+def test_detect_many_keeps_order_and_shares_cache(tmp_path):
+    backend = EchoBackend(InferenceCache(str(tmp_path / "cache.db")))
+    results = backend.detect_many([b"1564", b"0012", b"1564", b"7"])
+    assert [group_digits_to_reading(r) for r in results] == ["1564", "0012", "1564", "0007"]
+    calls = backend.calls
+    assert group_digits_to_reading(backend.detect(b"0012")) == "0012"
+    assert backend.calls == calls  # answered from the cache
+
+def test_registry_and_gemini_text_parsing():
+    assert build_backend('local', None, None, use_cache=False).name == 'local'
+    try:
+        build_backend('nope', None, None, use_cache=False)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert extract_kwh_values("Reading: 1564 KWh")[0] == 1564.0
+    assert extract_kwh_values("No KWh readings found") == []
+
+class FakeGeminiModel:
+    def __init__(self, text):
+        self.text = text
+
+    def generate_content(self, parts):
+        return self
+
+def test_gemini_readings_have_unknown_confidence():
+    backend = GeminiBackend("key")
+    backend.model = FakeGeminiModel("The meter shows 1564 KWh")
+    detections = backend.detect(draw_reading("1564"), confidence=0.3)
+    assert group_digits_to_reading(detections) == "1564"
+    assert detections['confidence_known'] is False
+    assert {det['confidence'] for det in detections['predictions']} == {0.0}
+
+if __name__ == "__main__":
+    test_local_backend_reads_all_digits()
+    import tempfile, pathlib
+    test_local_backend_reads_image_files(pathlib.Path(tempfile.mkdtemp()))
+    test_cascade_uses_hosted_only_when_unsure()
+    test_detect_many_keeps_order_and_shares_cache(pathlib.Path(tempfile.mkdtemp()))
+    test_registry_and_gemini_text_parsing()
+    test_gemini_readings_have_unknown_confidence()
+    print("Detector backend tests passed")
@@ -0,0 +1,43 @@
+import cv2
+from evaluate import load_manifest, parse_config, evaluate_config
+from mock_roboflow import MockRoboflowServer, digit_predictions
+from test_detector_backends import draw_reading
+
+def make_meter_video(path, readings, seconds_each=1, fps=5):
+    """One reading per `seconds_each` seconds of video."""
+    frame = draw_reading(readings[0])
+    h, w = frame.shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, (w, h))
+    for reading in readings:
+        for _ in range(seconds_each * fps):
+            writer.write(draw_reading(reading))
+    writer.release()
+
+def test_evaluate_configs(tmp_path):
+    video = tmp_path / "meter.avi"
+    make_meter_video(video, ['1564', '1580', '1602'])
+    manifest_path = tmp_path / "manifest.csv"
+    manifest_path.write_text("video,timestamp,reading\n"
+                             f"{video},0.5,1564\n{video},1.5,1580\n{video},2.5,1602\n")
+    manifest = load_manifest(str(manifest_path))
+    assert manifest[1] == {'video': str(video), 'timestamp': 1.5, 'reading': '1580'}
+
+    local = evaluate_config(manifest, parse_config("backend=local,confidence=0.1"), "http://unused", "key", "p", "1")
+    assert local['accuracy'] == 1.0
+    assert local['api_calls'] == 0 and local['bytes_uploaded'] == 0
+
+    # The mock always answers 1564, so only the first frame is right
+    server = MockRoboflowServer([digit_predictions('1564')]).start()
+    try:
+        hosted = evaluate_config(manifest, parse_config("backend=roboflow,roi=0,skip_unchanged=0"),
+                                 server.url, "key", "p", "1")
+    finally:
+        server.stop()
+    assert abs(hosted['accuracy'] - 1 / 3) < 1e-9
+    assert hosted['api_calls'] == 3
+    assert hosted['bytes_uploaded'] > 0
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_evaluate_configs(pathlib.Path(tempfile.mkdtemp()))
+    print("Evaluation tests passed")
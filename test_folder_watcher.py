@@ -0,0 +1,87 @@
+import threading
+import time
+from metrics import metrics
+from folder_watcher import FolderProcessor, ImageManifest, PollingWatcher, make_watcher, file_hash
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_each_image_content_processed_once(tmp_path):
+    folder = tmp_path / "input"
+    folder.mkdir()
+    (folder / "existing.jpg").write_bytes(b"meter-1")
+    (folder / "notes.txt").write_bytes(b"ignored")
+
+    calls = []
+    results = []
+    manifest = ImageManifest(str(tmp_path / "manifest.db"))
+    processor = FolderProcessor(str(folder), lambda path: calls.append(path) or "1564 KWh", manifest,
+                                workers=2, rate=100, on_result=lambda path, r: results.append(r), interval=0.1)
+    thread = threading.Thread(target=processor.run, daemon=True)
+    thread.start()
+    try:
+        assert wait_for(lambda: len(calls) == 1)
+        (folder / "new.jpg").write_bytes(b"meter-2")
+        (folder / "copy.jpg").write_bytes(b"meter-1")  # same content as existing.jpg
+        assert wait_for(lambda: len(calls) == 2)
+        time.sleep(0.5)
+        assert len(calls) == 2
+        assert results == ["1564 KWh", "1564 KWh"]
+    finally:
+        processor.stop()
+        thread.join(5)
+
+    # A restart does not send already processed images again
+    assert not manifest.claim(file_hash(str(folder / "new.jpg")))
+
+def test_polling_watcher_waits_for_stable_files(tmp_path):
+    watcher = PollingWatcher(str(tmp_path), interval=0)
+    (tmp_path / "a.jpg").write_bytes(b"x")
+    assert watcher.poll(0) == []       # first sighting
+    assert watcher.poll(0) == ["a.jpg"]  # unchanged since the last listing
+    assert watcher.poll(0) == []       # reported once
+    assert make_watcher(str(tmp_path)) is not None
+
+class FailingBackend:
+    def detect(self, image, confidence=0.1):
+        return None  # What a backend returns when its API call failed
+
+def test_failed_image_is_released_for_retry(tmp_path):
+    from extract_text import ExtractionError, process_image
+    folder = tmp_path / "input"
+    folder.mkdir()
+    (folder / "meter.jpg").write_bytes(b"meter-1")
+
+    manifest = ImageManifest(str(tmp_path / "manifest.db"))
+    results = []
+    failed_before = metrics.get_counter('folder_images_failed')
+    processor = FolderProcessor(str(folder), lambda path: process_image(FailingBackend(), path), manifest,
+                                workers=1, rate=100, on_result=lambda path, r: results.append(r), interval=0.1)
+    thread = threading.Thread(target=processor.run, daemon=True)
+    thread.start()
+    digest = file_hash(str(folder / "meter.jpg"))
+    try:
+        assert wait_for(lambda: metrics.get_counter('folder_images_failed') > failed_before)
+        # The failure is neither recorded nor reported as a result, and the claim is given back
+        assert manifest.claim(digest)
+        assert results == []
+    finally:
+        processor.stop()
+        thread.join(5)
+    try:
+        process_image(FailingBackend(), str(folder / "meter.jpg"))
+        assert False, "expected ExtractionError"
+    except ExtractionError:
+        pass
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_each_image_content_processed_once(pathlib.Path(tempfile.mkdtemp()))
+    test_polling_watcher_waits_for_stable_files(pathlib.Path(tempfile.mkdtemp()))
+    test_failed_image_is_released_for_retry(pathlib.Path(tempfile.mkdtemp()))
+    print("Folder watcher tests passed")
@@ -0,0 +1,34 @@
+import numpy as np
+from frame_archive import FrameArchive
+
+def test_put_get_dedup_and_pack_rollover(tmp_path):
+    archive = FrameArchive(str(tmp_path), pack_max_bytes=2000, max_side=64)
+    frames = [np.full((240, 320, 3), level, dtype=np.uint8) for level in (10, 120, 240)]
+    ids = [archive.put(frame) for frame in frames]
+    assert len(set(ids)) == 3
+    assert archive.put(frames[0]) == ids[0]  # same content, stored once
+    assert len(archive) == 3
+
+    data = archive.get(ids[1])
+    assert data[:2] == b'\xff\xd8'  # JPEG
+    assert archive.get("0" * 32) is None
+
+    # ROI crops are archived too, downscaled to max_side
+    import cv2
+    roi_id = archive.put(np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8), roi=(100, 50, 200, 100))
+    image = cv2.imdecode(np.frombuffer(archive.get(roi_id), np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape[:2] == (32, 64)
+    assert len(list(tmp_path.glob("pack-*.dat"))) >= 2
+    archive.close()
+
+    # The index survives a restart and new frames append after the old ones
+    archive = FrameArchive(str(tmp_path), pack_max_bytes=2000, max_side=64)
+    assert archive.get(ids[1]) == data
+    archive.put(np.zeros((10, 10, 3), dtype=np.uint8))
+    assert len(archive) == 5
+    archive.close()
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_put_get_dedup_and_pack_rollover(pathlib.Path(tempfile.mkdtemp()))
+    print("Frame archive tests passed")
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import numpy as np
+import roboflow_integration
+from frame_change import FrameChangeDetector
+from detector_backends import DetectorBackend, GeminiBackend
+from reading_fusion import ReadingFusion
+from sampling_scheduler import AdaptiveScheduler
+from roboflow_integration import RoboflowMeterDetector
+from test_detector_backends import FakeGeminiModel, draw_reading
+
+def make_frame(digit_value):
+    frame = np.zeros((120, 200, 3), dtype=np.uint8)
+    frame[40:80, 20:180] = digit_value
+    return frame
+
+def test_unchanged_frame_is_skipped():
+    detector = FrameChangeDetector(threshold=4.0)
+    assert not detector.is_unchanged("meter", make_frame(200))
+
+    detector.remember("meter", make_frame(200))
+    noisy = make_frame(200)
+    noisy[0, 0] = 255  # a little sensor noise
+    assert detector.is_unchanged("meter", noisy)
+    assert not detector.is_unchanged("meter", make_frame(60))
+
+def test_dhash_method():
+    detector = FrameChangeDetector(method='dhash')
+    frame = make_frame(200)
+    detector.remember("meter", frame)
+    assert detector.is_unchanged("meter", frame.copy())
+
+class BrightDigitsBackend(DetectorBackend):
+    """Reports the next reading as one box per digit, spread over the bright pixels of the image."""
+    name = 'fake'
+
+    def __init__(self, readings, confidence):
+        self.readings = list(readings)
+        self.confidence = confidence
+        self.calls = 0
+
+    def infer(self, image, confidence=0.1):
+        reading = self.readings[min(self.calls, len(self.readings) - 1)]
+        self.calls += 1
+        ys, xs = np.nonzero(image.max(axis=2) > 100)
+        x1, x2, y1, y2 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+        width = (x2 - x1) / len(reading)
+        return {'predictions': [{'class': digit, 'x': x1 + (i + 0.5) * width, 'y': (y1 + y2) / 2,
+                                 'width': width, 'height': y2 - y1, 'confidence': self.confidence}
+                                for i, digit in enumerate(reading)]}
+
+def meter_frame(text):
+    """A 720p frame with a small display, so one digit is a tiny part of the image."""
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    display = draw_reading(text)
+    frame[300:300 + display.shape[0], 500:500 + display.shape[1]] = display
+    return frame
+
+def test_digit_change_without_roi_is_inferred():
+    # Low confidence: the ROI is never learned, so only the whole frame could be compared
+    backend = BrightDigitsBackend(["1564", "1565"], confidence=0.3)
+    detector = RoboflowMeterDetector("key", "project", "1", backend=backend)
+    assert detector.process_frame("m", meter_frame("1564"), 0.0)['reading'] == "1564"
+    result = detector.process_frame("m", meter_frame("1565"), 5.0)
+    assert backend.calls == 2
+    assert result['reading'] == "1565" and not result.get('reused')
+
+def test_unchanged_roi_is_skipped_and_digit_change_is_not():
+    backend = BrightDigitsBackend(["1564", "1565"], confidence=0.9)
+    detector = RoboflowMeterDetector("key", "project", "1", backend=backend)
+    detector.process_frame("m", meter_frame("1564"), 0.0)
+    assert detector.process_frame("m", meter_frame("1564"), 5.0)['reused']
+    assert backend.calls == 1
+    result = detector.process_frame("m", meter_frame("1565"), 10.0)
+    assert backend.calls == 2
+    assert result['reading'] == "1565"
+
+def test_unknown_confidence_is_not_treated_as_low():
+    backend = GeminiBackend("key", cache=None)
+    backend.model = FakeGeminiModel("1564 KWh")
+    detector = RoboflowMeterDetector("key", "project", "1", backend=backend)
+    scheduler, fusion = AdaptiveScheduler(), ReadingFusion()
+    for t in (0.0, 5.0):
+        result = detector.process_frame("m", meter_frame("1564"), t)
+        assert result['reading'] == "1564"
+        assert result['avg_confidence'] is None and result['roi'] is None
+        assert fusion.update("m", result['digits'], t)[0] == 1564.0
+        scheduler.record("m", t, float(result['reading']), result['avg_confidence'])
+    # A stable reading backs off instead of staying at min_interval as an unsure one would
+    assert scheduler.state("m")['interval'] > scheduler.min_interval
+
+def test_concurrent_initialization_builds_one_detector():
+    built = []
+
+    def slow_detector(**kwargs):
+        time.sleep(0.05)
+        built.append(kwargs)
+        return object()
+
+    saved = (roboflow_integration.roboflow_detector, roboflow_integration.RoboflowMeterDetector,
+             roboflow_integration.build_backend)
+    roboflow_integration.roboflow_detector = None
+    roboflow_integration.RoboflowMeterDetector = slow_detector
+    roboflow_integration.build_backend = lambda *args, **kwargs: None
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(roboflow_integration.initialize_roboflow_detector()))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(built) == 1
+        assert len(results) == 8 and all(result is results[0] for result in results)
+    finally:
+        (roboflow_integration.roboflow_detector, roboflow_integration.RoboflowMeterDetector,
+         roboflow_integration.build_backend) = saved
+
+if __name__ == "__main__":
+    test_unchanged_frame_is_skipped()
+    test_dhash_method()
+    test_digit_change_without_roi_is_inferred()
+    test_unchanged_roi_is_skipped_and_digit_change_is_not()
+    test_unknown_confidence_is_not_treated_as_low()
+    test_concurrent_initialization_builds_one_detector()
+    print("Frame change tests passed")
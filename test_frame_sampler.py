@@ -0,0 +1,27 @@
+from frame_sampler import sample_indices, iter_frames
+from test_video_decoder import make_video, brightness
+
+def test_sampling_policies():
+    assert list(sample_indices(91, 30, count=4)) == [0, 30, 60, 90]
+    assert list(sample_indices(3, 30, count=10)) == [0, 1, 2]
+    assert list(sample_indices(100, 10, interval=2.5)) == [0, 25, 50, 75]
+    assert list(sample_indices(10, 30, every=4)) == [0, 4, 8]
+
+def test_iter_frames_streams_sampled_frames(tmp_path):
+    video_path = tmp_path / "meter.avi"
+    make_video(video_path, frames=60, fps=10)
+
+    frames = iter_frames(str(video_path), interval=1.0)
+    first = next(frames)
+    assert first[0] == 0 and first[1] == 0.0
+
+    sampled = [first] + list(frames)
+    assert [index for index, _, _ in sampled] == [0, 10, 20, 30, 40, 50]
+    assert [brightness(frame) for _, _, frame in sampled] == [0, 10, 20, 30, 40, 50]
+    assert sampled[-1][1] == 5000.0
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_sampling_policies()
+    test_iter_frames_streams_sampled_frames(pathlib.Path(tempfile.mkdtemp()))
+    print("Frame sampler tests passed")
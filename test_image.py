@@ -1,20 +1,31 @@
+import os
+import pytest
 from extract_text import setup_gemini, process_image
+from inference_cache import InferenceCache
 
-def test_single_image():
-    # Initialize Gemini
-    model = setup_gemini()
+ENHANCED_IMAGE = "input/enhanced_20250330_174043.jpg"
+ORIGINAL_IMAGE = "input/original_20250330_174043.jpg"
+
+def test_single_image(tmp_path):
+    # Needs the sample images and the Gemini API; process_image raises when either is missing
+    if not (os.path.exists(ENHANCED_IMAGE) and os.path.exists(ORIGINAL_IMAGE)):
+        pytest.skip("sample images not present in input/")
+
+    # Initialize Gemini (cache in the test directory, not inference_cache.db in the repo)
+    model = setup_gemini(cache=InferenceCache(str(tmp_path / "inference_cache.db")))
     print("Model initialized")
     
     # Process both enhanced and original image
-    image_path = "input/enhanced_20250330_174043.jpg"
+    image_path = ENHANCED_IMAGE
     print(f"\nTesting enhanced image: {image_path}")
     result = process_image(model, image_path)
     print(f"Enhanced image result: {result}")
     
-    image_path = "input/original_20250330_174043.jpg"
+    image_path = ORIGINAL_IMAGE
     print(f"\nTesting original image: {image_path}")
     result = process_image(model, image_path)
     print(f"Original image result: {result}")
 
 if __name__ == "__main__":
-    test_single_image()
+    import tempfile, pathlib
+    test_single_image(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,34 @@
+from inference_cache import InferenceCache
+
+def test_cache_roundtrip_and_key_parameters(tmp_path):
+    cache = InferenceCache(str(tmp_path / "cache.db"))
+    payload = b"aGVsbG8="
+    key = cache.make_key(payload, "7-segments-custom-hblhp/6", 0.05)
+    cache.put(key, {'predictions': [{'class': '1', 'x': 10}]})
+
+    assert cache.get(key)['predictions'][0]['class'] == '1'
+    # A different confidence or model version is a different entry
+    assert cache.get(cache.make_key(payload, "7-segments-custom-hblhp/6", 0.3)) is None
+    assert cache.get(cache.make_key(payload, "7-segments-custom-hblhp/5", 0.05)) is None
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = InferenceCache(str(tmp_path / "cache.db"), max_bytes=400)
+    keys = [cache.make_key(bytes([i]), "model/1", 0.1) for i in range(3)]
+    for key in keys[:2]:
+        cache.put(key, {'predictions': []})
+    cache.get(keys[0])  # keys[1] is now the least recently used
+    for i in range(3, 6):
+        cache.put(cache.make_key(bytes([i]), "model/1", 0.1), {'predictions': []})
+
+    assert cache.total_bytes <= 400
+    assert cache.get(keys[1]) is None
+
+    # Reopening keeps entries and the size accounting
+    reopened = InferenceCache(cache.path, max_bytes=400)
+    assert reopened.total_bytes == cache.total_bytes
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_cache_roundtrip_and_key_parameters(pathlib.Path(tempfile.mkdtemp()))
+    test_cache_evicts_least_recently_used(pathlib.Path(tempfile.mkdtemp()))
+    print("Inference cache tests passed")
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from inference_client import InferenceClient, InferenceError, CircuitBreaker, CircuitOpenError
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Status codes to return, in order; the last one repeats
+    statuses = [200]
+    calls = 0
+    body = json.dumps({'predictions': [{'class': '7', 'x': 10, 'confidence': 0.9}]}).encode()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        cls = type(self)
+        status = cls.statuses[min(cls.calls, len(cls.statuses) - 1)]
+        cls.calls += 1
+        body = cls.body
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub(statuses, body=StubHandler.body):
+    handler = type('Handler', (StubHandler,), {'statuses': statuses, 'calls': 0, 'body': body})
+    server = HTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, handler, f"http://127.0.0.1:{server.server_port}/model/1"
+
+def test_retries_transient_errors():
+    server, handler, url = start_stub([503, 429, 200])
+    try:
+        client = InferenceClient(url, "key", backoff_base=0.001, breaker=CircuitBreaker())
+        result = client.infer(b"aGVsbG8=", confidence=0.1)
+        assert result['predictions'][0]['class'] == '7'
+        assert handler.calls == 3
+    finally:
+        server.shutdown()
+
+def test_circuit_breaker_fails_fast():
+    server, handler, url = start_stub([500])
+    try:
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        client = InferenceClient(url, "key", max_retries=0, breaker=breaker)
+        for _ in range(2):
+            try:
+                client.infer(b"aGVsbG8=", confidence=0.1)
+            except CircuitOpenError:
+                raise
+            except InferenceError:
+                pass
+        assert breaker.state == 'open'
+
+        calls = handler.calls
+        try:
+            client.infer(b"aGVsbG8=", confidence=0.1)
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError:
+            pass
+        assert handler.calls == calls
+    finally:
+        server.shutdown()
+
+def test_half_open_admits_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow() and not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+def test_malformed_body_counts_as_failure():
+    server, handler, url = start_stub([200], body=b"<html>gateway hiccup")
+    try:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        client = InferenceClient(url, "key", max_retries=1, backoff_base=0.001, breaker=breaker)
+        try:
+            client.infer(b"aGVsbG8=", confidence=0.1)
+            assert False, "expected InferenceError"
+        except CircuitOpenError:
+            raise
+        except InferenceError as e:
+            assert "Malformed response" in str(e)
+        assert handler.calls == 2
+        assert breaker.state == 'open'
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_retries_transient_errors()
+    test_circuit_breaker_fails_fast()
+    test_half_open_admits_one_probe()
+    test_malformed_body_counts_as_failure()
+    print("Inference client tests passed")
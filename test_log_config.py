@@ -0,0 +1,29 @@
+import json
+import logging
+from log_config import JsonFormatter, SamplingFilter
+
+def make_record(msg, args=(), **extra):
+    record = logging.LogRecord('app', logging.DEBUG, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+def test_sampling_filter_only_thins_marked_records():
+    sampler = SamplingFilter(every=5)
+    sampled = [sampler.filter(make_record("frame %s", (i,), sample=True)) for i in range(20)]
+    assert sum(sampled) == 4
+
+    plain = [sampler.filter(make_record("saved %s", (i,))) for i in range(20)]
+    assert all(plain)
+
+def test_json_formatter_includes_extra_fields():
+    line = JsonFormatter().format(make_record("reading %s", ("1564",), meter_id="default"))
+    payload = json.loads(line)
+    assert payload['message'] == "reading 1564"
+    assert payload['meter_id'] == "default"
+    assert payload['level'] == "DEBUG"
+
+if __name__ == "__main__":
+    test_sampling_filter_only_thins_marked_records()
+    test_json_formatter_includes_extra_fields()
+    print("Logging tests passed")
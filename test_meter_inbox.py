@@ -0,0 +1,54 @@
+import threading
+import time
+from meter_inbox import MeterInbox, InboxFull
+
+def slow_handler(gate):
+    def handler(payload, deadline):
+        gate.wait(2)
+        return payload
+    return handler
+
+def test_latest_wins_drops_older_queued_request():
+    gate = threading.Event()
+    inbox = MeterInbox(slow_handler(gate), capacity=1, policy='latest')
+    running = inbox.submit("m", 1)
+    time.sleep(0.05)  # let the worker pick up the first request
+    older = inbox.submit("m", 2)
+    newer = inbox.submit("m", 3)
+    assert older.wait(1) and older.status == 'superseded'
+    gate.set()
+    assert running.wait(1) and running.result == 1
+    assert newer.wait(1) and newer.result == 3
+
+def test_coalesce_shares_one_result():
+    gate = threading.Event()
+    inbox = MeterInbox(slow_handler(gate), capacity=1, policy='coalesce')
+    inbox.submit("m", 1)
+    time.sleep(0.05)
+    first = inbox.submit("m", 2)
+    second = inbox.submit("m", 3)
+    assert first is second
+    gate.set()
+    assert second.wait(1) and second.result == 3
+
+def test_reject_and_deadline():
+    gate = threading.Event()
+    inbox = MeterInbox(slow_handler(gate), capacity=1, policy='reject', deadline=0.1)
+    inbox.submit("m", 1)
+    time.sleep(0.05)
+    queued = inbox.submit("m", 2)
+    try:
+        inbox.submit("m", 3)
+        assert False, "expected InboxFull"
+    except InboxFull as e:
+        assert e.retry_after >= 1
+    time.sleep(0.2)
+    gate.set()
+    # The queued request waited past its deadline and is never handled
+    assert queued.wait(1) and queued.status == 'expired'
+
+if __name__ == "__main__":
+    test_latest_wins_drops_older_queued_request()
+    test_coalesce_shares_one_result()
+    test_reject_and_deadline()
+    print("Meter inbox tests passed")
@@ -0,0 +1,31 @@
+from metrics import MetricsRegistry
+
+def test_timer_records_latency_and_errors():
+    registry = MetricsRegistry()
+    for _ in range(3):
+        with registry.timer('db_save_reading'):
+            pass
+    try:
+        with registry.timer('roboflow_request'):
+            raise RuntimeError("timeout")
+    except RuntimeError:
+        pass
+
+    assert registry.snapshot('db_save_reading')['count'] == 3
+    assert registry.snapshot('roboflow_request')['errors'] == 1
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    registry.observe('frame_seek', 0.02)
+    registry.inc('inference_skipped', meter='default')
+    text = registry.render()
+
+    assert 'enervise_stage_duration_seconds_bucket{stage="frame_seek",le="0.025"} 1' in text
+    assert 'enervise_stage_latency_seconds{stage="frame_seek",quantile="0.99"} 0.020000' in text
+    assert 'enervise_stage_in_flight' in text
+    assert 'enervise_inference_skipped_total{meter="default"} 1' in text
+
+if __name__ == "__main__":
+    test_timer_records_latency_and_errors()
+    test_render_prometheus_text()
+    print("Metrics tests passed")
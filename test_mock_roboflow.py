@@ -0,0 +1,33 @@
+from mock_roboflow import MockRoboflowServer, digit_predictions
+from inference_client import InferenceClient, InferenceError, CircuitBreaker
+
+def test_replays_recorded_responses():
+    server = MockRoboflowServer([digit_predictions('12'), digit_predictions('34')]).start()
+    try:
+        client = InferenceClient(server.url + "/model/1", "key", breaker=CircuitBreaker())
+        first = client.infer(b"aGVsbG8=", confidence=0.1)
+        second = client.infer(b"aGVsbG8=", confidence=0.1)
+        assert [p['class'] for p in first['predictions']] == ['1', '2']
+        assert [p['class'] for p in second['predictions']] == ['3', '4']
+        assert server.requests == 2
+    finally:
+        server.stop()
+
+def test_error_rate():
+    server = MockRoboflowServer(error_rate=1.0, error_status=500).start()
+    try:
+        client = InferenceClient(server.url + "/model/1", "key", max_retries=1, backoff_base=0.001,
+                                 breaker=CircuitBreaker())
+        try:
+            client.infer(b"aGVsbG8=", confidence=0.1)
+            assert False, "expected an InferenceError"
+        except InferenceError:
+            pass
+        assert server.errors == 2
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    test_replays_recorded_responses()
+    test_error_rate()
+    print("Mock Roboflow tests passed")
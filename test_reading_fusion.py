@@ -0,0 +1,43 @@
+from reading_fusion import ReadingFusion
+
+def digits(text, confidence=0.9, low=None):
+    """[(digit, confidence)] with an optional low-confidence position."""
+    return [(d, 0.3 if i == low else confidence) for i, d in enumerate(text)]
+
+def test_low_confidence_misread_is_voted_away():
+    fusion = ReadingFusion()
+    assert fusion.update("m", digits("1564"), 0) == (1564.0, 'accepted')
+    assert fusion.update("m", digits("1564"), 5) == (1564.0, 'unchanged')
+    # '5' misread as '8' with low confidence: history wins
+    assert fusion.update("m", digits("1864", low=1), 10) == (1564.0, 'unchanged')
+    # A confident change goes through at once
+    assert fusion.update("m", digits("1565"), 15) == (1565.0, 'accepted')
+
+def test_monotonic_and_rate_bound_with_confirmation():
+    fusion = ReadingFusion(max_rate_per_hour=36, slack=1, confirm=2)
+    fusion.update("m", digits("1564"), 0)
+    assert fusion.update("m", digits("1560"), 10) == (1564.0, 'rejected_decrease')
+    # 36 kWh/h over 100s allows 1 kWh plus 1 of slack
+    assert fusion.update("m", digits("1566"), 100) == (1566.0, 'accepted')
+    assert fusion.update("m", digits("1999"), 110) == (1566.0, 'rejected_rate')
+
+    # A replaced meter: agreeing detections re-anchor
+    fusion = ReadingFusion(confirm=2)
+    fusion.update("m", digits("1564"), 0)
+    assert fusion.update("m", digits("0012"), 5)[1] == 'rejected_decrease'
+    assert fusion.update("m", digits("0012"), 10) == (12.0, 'confirmed')
+
+def test_stray_digit_and_backward_time():
+    fusion = ReadingFusion()
+    fusion.update("m", digits("1564"), 0)
+    fusion.update("m", digits("1564"), 5)
+    # An extra detected digit is outvoted by the usual width
+    assert fusion.update("m", digits("71564"), 10) == (1564.0, 'unchanged')
+    # The video restarted: the filter starts over instead of rejecting
+    assert fusion.update("m", digits("1500"), 1) == (1500.0, 'accepted')
+
+if __name__ == "__main__":
+    test_low_confidence_misread_is_voted_away()
+    test_monotonic_and_rate_bound_with_confirmation()
+    test_stray_digit_and_backward_time()
+    print("Reading fusion tests passed")
@@ -0,0 +1,25 @@
+from reading_window import DeltaRingBuffer, DuplicateWindow
+
+def test_ring_buffer_tolerance_and_eviction():
+    buffer = DeltaRingBuffer(size=3, tolerance=0.1)
+    for value in [5, 6, 7]:
+        buffer.add(value)
+
+    assert buffer.contains(6.05)
+    assert not buffer.contains(6.2)
+
+    # Adding a fourth value evicts the oldest one
+    buffer.add(8)
+    assert not buffer.contains(5)
+    assert buffer.values() == [6.0, 7.0, 8.0]
+
+def test_duplicate_window_is_per_meter():
+    window = DuplicateWindow(size=10)
+    window.seed("meter-a", [12, 15])
+    assert window.is_duplicate("meter-a", 15)
+    assert not window.is_duplicate("meter-b", 15)
+
+if __name__ == "__main__":
+    test_ring_buffer_tolerance_and_eviction()
+    test_duplicate_window_is_per_meter()
+    print("Reading window tests passed")
@@ -0,0 +1,33 @@
+import numpy as np
+from roi import RoiTracker
+
+def digit(cls, x, y, confidence=0.9):
+    return {'class': cls, 'x': x, 'y': y, 'width': 20, 'height': 40, 'confidence': confidence}
+
+def test_roi_crop_and_coordinate_mapping():
+    tracker = RoiTracker(margin=0.5, max_width=50)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert tracker.region("meter", frame.shape) is None
+
+    tracker.update("meter", [digit('1', 300, 200), digit('5', 340, 200)], avg_confidence=0.9)
+    roi = tracker.region("meter", frame.shape)
+    image, transform = tracker.crop(frame, roi)
+    assert image.shape[1] == 50
+    assert image.shape[0] < frame.shape[0]
+
+    # A detection in the crop maps back to where it sits in the full frame
+    x0, y0, scale = transform
+    mapped = tracker.to_frame_coords([digit('1', (300 - x0) * scale, (200 - y0) * scale)], transform)
+    assert abs(mapped[0]['x'] - 300) < 1e-6
+    assert abs(mapped[0]['y'] - 200) < 1e-6
+
+def test_low_confidence_falls_back_to_full_frame():
+    tracker = RoiTracker(min_confidence=0.5)
+    tracker.update("meter", [digit('1', 300, 200)], avg_confidence=0.9)
+    tracker.update("meter", [digit('1', 300, 200, 0.2)], avg_confidence=0.2)
+    assert tracker.region("meter", (480, 640, 3)) is None
+
+if __name__ == "__main__":
+    test_roi_crop_and_coordinate_mapping()
+    test_low_confidence_falls_back_to_full_frame()
+    print("ROI tests passed")
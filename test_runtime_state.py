@@ -0,0 +1,103 @@
+import sqlite3
+from database import init_db, save_reading, save_runtime_state, load_runtime_state, clear_runtime_state, get_readings
+from reading_fusion import ReadingFusion
+from sampling_scheduler import AdaptiveScheduler
+
+def test_runtime_state_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    init_db()
+    assert load_runtime_state('meter:default') is None
+    save_runtime_state('meter:default', {'initial_reading': 1564.0})
+    save_runtime_state('meter:default', {'initial_reading': 1570.0, 'phase': 'three'})
+    assert load_runtime_state('meter:default') == {'initial_reading': 1570.0, 'phase': 'three'}
+    clear_runtime_state()
+    assert load_runtime_state('meter:default') is None
+
+def fresh_process(monkeypatch, app_module):
+    """Put app.py's globals back to what a newly started process has."""
+    for name, value in {
+        '_db_initialized': False,
+        'initial_reading_value': None,
+        'last_reading': "No reading yet",
+        'last_reading_time': None,
+        'last_bill_amount': 0,
+        'current_phase': "single",
+        'process_started': False,
+        'detection_active': False,
+        'sampling_scheduler': AdaptiveScheduler(),
+        'reading_fusion': ReadingFusion(),
+        'frame_archive': None,
+    }.items():
+        monkeypatch.setattr(app_module, name, value)
+
+def detection(reading):
+    return {'success': True, 'reading': reading, 'avg_confidence': 0.9, 'digits': [(d, 0.9) for d in reading]}
+
+def test_restart_restores_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    monkeypatch.setattr(app_module, 'get_bill_from_site', lambda units, phase: units * 5.0)
+    config = {'TESTING': True, 'FRAME_ARCHIVE_DIR': ''}
+
+    fresh_process(monkeypatch, app_module)
+    client = app_module.create_app(config).test_client()
+    client.post('/start_process')
+    app_module.record_detection('default', detection('1564'), 1.0)
+    app_module.record_detection('default', detection('1590'), 10.0)
+    client.post('/update_phase', json={'phase': 'three'})
+
+    # Restart: new process state, same database
+    fresh_process(monkeypatch, app_module)
+    client = app_module.create_app(config).test_client()
+    assert app_module.initial_reading_value == 1564.0
+    assert app_module.last_reading == "26 KWh (Δ)"
+    assert app_module.last_bill_amount == 130.0
+    assert app_module.current_phase == "three"
+    assert app_module.duplicate_window.is_duplicate('default', 26.0)
+
+    # Starting detection keeps the restored meter state, so a lower misread is still rejected
+    client.post('/start_process')
+    assert app_module.reading_fusion.state('default')['value'] == 1590.0
+    result = app_module.record_detection('default', detection('1560'), 0.5)
+    assert result['message'] == 'Implausible reading rejected'
+    assert len(get_readings()) == 1
+
+def test_reset_all_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    app_module.init_db()
+    app_module.init_extended_db()
+    save_reading("26 KWh (Δ)")
+    save_runtime_state('meter:default', {'initial_reading': 1564.0})
+    conn = sqlite3.connect('readings.db')
+    conn.execute('INSERT INTO user_settings (user_id, daily_cost_limit) VALUES (?, ?)', ('admin', 100.0))
+    conn.commit()
+    conn.close()
+
+    app_module.reset_all_data()
+    assert get_readings() == []
+    assert load_runtime_state('meter:default') is None
+    assert app_module.get_cost_limit('admin') == 0
+
+def test_extraction_results_stay_off_the_dashboard(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    from extract_text import save_result
+    monkeypatch.setattr(app_module, '_db_initialized', False)
+    client = app_module.create_app({'TESTING': True, 'FRAME_ARCHIVE_DIR': ''}).test_client()
+    client.post('/login', data={'email': app_module.VALID_EMAIL, 'password': app_module.VALID_PASSWORD})
+    save_reading("26 KWh (Δ)", bill_details={'fixed_charge': 50, 'energy_charge': 70, 'tod_charge': 0,
+                                             'duty': 10, 'subsidy': 0, 'final': 130.0})
+
+    save_result(str(tmp_path / "meter.jpg"), "1564 KWh")
+    assert [row[0] for row in get_readings()] == ["26 KWh (Δ)"]
+
+    # A row without a bill (from older versions) does not break the dashboard
+    save_reading("1564 KWh")
+    data = client.get('/get_dashboard_data').get_json()
+    assert 'error' not in data
+    assert data['current_bill'] == 130.0
+
+if __name__ == "__main__":
+    import pytest, sys
+    sys.exit(pytest.main([__file__, "-q"]))
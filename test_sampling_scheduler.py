@@ -0,0 +1,47 @@
+from sampling_scheduler import AdaptiveScheduler
+
+def test_backs_off_while_stable_and_tightens_on_change():
+    scheduler = AdaptiveScheduler(min_interval=5, max_interval=40, backoff=2)
+    assert scheduler.should_sample("meter", 0)
+    scheduler.record("meter", 0, 100.0, 0.9)
+    assert not scheduler.should_sample("meter", 4)
+
+    # Stable readings double the interval up to the cap
+    now = 5
+    for expected in (10, 20, 40, 40):
+        assert scheduler.should_sample("meter", now)
+        scheduler.record("meter", now, 100.0, 0.9)
+        assert scheduler.state("meter")['interval'] == expected
+        now += expected
+
+    # A changed reading goes straight back to the minimum interval
+    assert scheduler.should_sample("meter", now)
+    scheduler.record("meter", now, 101.0, 0.9)
+    assert scheduler.state("meter")['interval'] == 5
+
+def test_low_confidence_and_failures_use_minimum_interval():
+    scheduler = AdaptiveScheduler(min_interval=5, max_interval=40, low_confidence=0.5)
+    scheduler.record("meter", 0, 100.0, 0.9)
+    scheduler.record("meter", 10, 100.0, 0.9)
+    scheduler.record("meter", 30, 100.0, 0.2)
+    assert scheduler.state("meter")['interval'] == 5
+    scheduler.record("meter", 35, 100.0, 0.9)
+    scheduler.record_failure("meter", 45)
+    assert scheduler.state("meter")['next_due'] == 50
+
+def test_budget_and_backward_jump():
+    scheduler = AdaptiveScheduler(min_interval=5, budget_per_hour=60)
+    # Capacity is one call per minute of budget; the rest are denied
+    assert scheduler.should_sample("a", 0)
+    assert not scheduler.should_sample("b", 0)
+
+    unlimited = AdaptiveScheduler(min_interval=5)
+    unlimited.record("meter", 100, 100.0, 0.9)
+    # The video restarted: sample immediately instead of waiting for t=105
+    assert unlimited.should_sample("meter", 1)
+
+if __name__ == "__main__":
+    test_backs_off_while_stable_and_tightens_on_change()
+    test_low_confidence_and_failures_use_minimum_interval()
+    test_budget_and_backward_jump()
+    print("Sampling scheduler tests passed")
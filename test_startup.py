@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter: other tests in this process have already imported NumPy and OpenCV
+PROBE = r'''
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import app as app_module
+after_import = [m for m in ('numpy', 'cv2', 'requests') if m in sys.modules]
+flask_app = app_module.create_app({'TESTING': True})
+again = app_module.create_app({'TESTING': True})
+response = flask_app.test_client().get('/get_reading')
+print(json.dumps({
+    'after_import': after_import,
+    'after_create_app': [m for m in ('numpy', 'cv2', 'requests') if m in sys.modules],
+    'status': response.status_code,
+    'reading': response.get_json()['reading'],
+    'separate_apps': flask_app is not again,
+}))
+'''
+
+def test_app_import_defers_heavy_modules(tmp_path):
+    # Scratch directory so readings.db and the frame archive are not created in the repo
+    output = subprocess.check_output([sys.executable, '-c', PROBE, REPO_DIR], cwd=str(tmp_path),
+                                     stderr=subprocess.DEVNULL, text=True)
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result['after_import'] == []
+    assert result['after_create_app'] == []
+    assert result['status'] == 200
+    assert result['reading'] == "No reading yet"
+    assert result['separate_apps']
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_app_import_defers_heavy_modules(pathlib.Path(tempfile.mkdtemp()))
+    print("Startup tests passed")
@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+from video_decoder import VideoDecoder
+
+def make_video(path, frames=60, fps=10):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, (64, 48))
+    for i in range(frames):
+        # Brightness encodes the frame index so reads can be checked
+        writer.write(np.full((48, 64, 3), i * 4, dtype=np.uint8))
+    writer.release()
+
+def brightness(frame):
+    return round(float(frame.mean()) / 4)
+
+def test_sequential_reads_do_not_seek(tmp_path):
+    video_path = tmp_path / "meter.avi"
+    make_video(video_path)
+    decoder = VideoDecoder(str(video_path), max_forward_seconds=2.0)
+
+    for timestamp in [0.0, 0.5, 1.0, 1.5, 2.0]:
+        frame = decoder.read_at(timestamp)
+        assert brightness(frame) == int(timestamp * 10)
+    assert decoder.seeks == 0
+
+    # Going backward seeks, repeating a timestamp is served from the cache
+    assert brightness(decoder.read_at(0.3)) == 3
+    assert decoder.seeks == 1
+    decoded = decoder.decoded
+    decoder.read_at(1.0)
+    assert decoder.decoded == decoded
+    decoder.close()
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_sequential_reads_do_not_seek(pathlib.Path(tempfile.mkdtemp()))
+    print("Video decoder tests passed")
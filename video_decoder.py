@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Video Decoder - Long-lived per-source decoder with sequential reads and a small frame cache
+"""
+
+import threading
+from collections import OrderedDict
+
+class VideoDecoder:
+    def __init__(self, video_path, cache_size=8, max_forward_seconds=10.0):
+        """Open the video once and keep the capture for later reads.
+
+        Requests that move forward by less than `max_forward_seconds` are served
+        by reading on from the current position; anything else seeks.
+        """
+        import cv2  # Deferred so importing this module does not load OpenCV
+        self._cv2 = cv2
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.cache_size = cache_size
+        self.max_forward_frames = int(max_forward_seconds * self.fps)
+
+        self._next_index = 0  # index of the frame the next read() will return
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.seeks = 0
+        self.decoded = 0
+
+    def frame_index(self, timestamp_seconds):
+        return int(timestamp_seconds * self.fps)
+
+    def read_at(self, timestamp_seconds):
+        """Return the frame shown at the given timestamp."""
+        return self.read_frame(self.frame_index(timestamp_seconds))
+
+    def read_frame(self, index):
+        """Return frame `index`, decoding as little as possible."""
+        with self._lock:
+            frame = self._cache.get(index)
+            if frame is not None:
+                self._cache.move_to_end(index)
+                return frame
+
+            gap = None if self._next_index is None else index - self._next_index
+            if gap is None or gap < 0 or gap > self.max_forward_frames:
+                # Backward or far jump: let the container seek to the keyframe
+                self.cap.set(self._cv2.CAP_PROP_POS_FRAMES, index)
+                self.seeks += 1
+            else:
+                # Short forward jump: step over frames without converting them
+                for _ in range(gap):
+                    if not self.cap.grab():
+                        break
+
+            ret, frame = self.cap.read()
+            if not ret:
+                self._next_index = None  # position is unknown; force a seek next time
+                raise ValueError(f"Could not extract frame {index} from {self.video_path}")
+
+            self.decoded += 1
+            self._next_index = index + 1
+            self._cache[index] = frame
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return frame
+
+    def close(self):
+        with self._lock:
+            self.cap.release()
+            self._cache.clear()